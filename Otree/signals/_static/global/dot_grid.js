@@ -0,0 +1,153 @@
+// Draws a dot-grid stimulus on a <canvas> from (red count, grid size, seed).
+// The layout is a port of dots.dot_layout, i.e. random.Random(seed).sample(range(n), n_red) in CPython:
+// the same Mersenne Twister, seeding and sampling steps, so a seed gives the same layout in both.
+// Keep the two in sync; the Signal page sends the drawn layout back and the server checks it
+// (helper_functions.verify_canvas_layout).
+(function () {
+  const N = 624;
+
+  function MersenneTwister(seed) {
+    this.mt = new Uint32Array(N);
+    this.index = N;
+    // random.seed(int): the absolute value as little-endian 32-bit words, [0] for zero
+    const key = [];
+    let rest = BigInt(seed < 0 ? -seed : seed);
+    do {
+      key.push(Number(rest & 0xffffffffn));
+      rest >>= 32n;
+    } while (rest > 0n);
+    this.initByArray(key);
+  }
+
+  MersenneTwister.prototype.initGenrand = function (s) {
+    const mt = this.mt;
+    mt[0] = s >>> 0;
+    for (let i = 1; i < N; i++) {
+      const prev = mt[i - 1] ^ (mt[i - 1] >>> 30);
+      mt[i] = (Math.imul(1812433253, prev) + i) >>> 0;
+    }
+  };
+
+  MersenneTwister.prototype.initByArray = function (key) {
+    const mt = this.mt;
+    this.initGenrand(19650218);
+    let i = 1, j = 0;
+    for (let k = Math.max(N, key.length); k; k--) {
+      const prev = mt[i - 1] ^ (mt[i - 1] >>> 30);
+      mt[i] = ((mt[i] ^ Math.imul(prev, 1664525)) + key[j] + j) >>> 0;
+      i++; j++;
+      if (i >= N) { mt[0] = mt[N - 1]; i = 1; }
+      if (j >= key.length) j = 0;
+    }
+    for (let k = N - 1; k; k--) {
+      const prev = mt[i - 1] ^ (mt[i - 1] >>> 30);
+      mt[i] = ((mt[i] ^ Math.imul(prev, 1566083941)) - i) >>> 0;
+      i++;
+      if (i >= N) { mt[0] = mt[N - 1]; i = 1; }
+    }
+    mt[0] = 0x80000000;
+  };
+
+  MersenneTwister.prototype.uint32 = function () {
+    const mt = this.mt;
+    if (this.index >= N) {
+      for (let kk = 0; kk < N; kk++) {
+        const y = (mt[kk] & 0x80000000) | (mt[(kk + 1) % N] & 0x7fffffff);
+        mt[kk] = mt[(kk + 397) % N] ^ (y >>> 1) ^ (y & 1 ? 0x9908b0df : 0);
+      }
+      this.index = 0;
+    }
+    let y = mt[this.index++];
+    y ^= y >>> 11;
+    y ^= (y << 7) & 0x9d2c5680;
+    y ^= (y << 15) & 0xefc60000;
+    y ^= y >>> 18;
+    return y >>> 0;
+  };
+
+  // random._randbelow_with_getrandbits
+  MersenneTwister.prototype.below = function (n) {
+    const k = 32 - Math.clz32(n);
+    let r;
+    do {
+      r = this.uint32() >>> (32 - k);
+    } while (r >= n);
+    return r;
+  };
+
+  // random.sample(range(n), k), both of its strategies
+  function sample(rng, n, k) {
+    const result = new Array(k);
+    let setsize = 21;
+    if (k > 5) setsize += Math.pow(4, Math.ceil(Math.log(k * 3) / Math.log(4)));
+    if (n <= setsize) {
+      const pool = Array.from({length: n}, (_, i) => i);
+      for (let i = 0; i < k; i++) {
+        const j = rng.below(n - i);
+        result[i] = pool[j];
+        pool[j] = pool[n - i - 1];
+      }
+    } else {
+      const selected = new Set();
+      for (let i = 0; i < k; i++) {
+        let j = rng.below(n);
+        while (selected.has(j)) j = rng.below(n);
+        selected.add(j);
+        result[i] = j;
+      }
+    }
+    return result;
+  }
+
+  // dots.dot_layout: row-major, top-left first, 1 where a dot is red
+  function layout(nRed, gridSize, seed) {
+    const total = gridSize * gridSize;
+    if (nRed > total) throw new Error('Number of red dots exceeds total grid size');
+    const red = new Uint8Array(total);
+    sample(new MersenneTwister(seed), total, nRed).forEach(function (i) { red[i] = 1; });
+    return red;
+  }
+
+  // Same encoding as dots.layout_hex: the mask packed MSB first, as hex
+  function toHex(red) {
+    let hex = '';
+    for (let i = 0; i < red.length; i += 8) {
+      let byte = 0;
+      for (let b = 0; b < 8; b++) byte = (byte << 1) | (red[i + b] || 0);
+      hex += byte.toString(16).padStart(2, '0');
+    }
+    return hex;
+  }
+
+  // Geometry of dots.render_dot_grid, in its pixels (DOT_PITCH_PX, DOT_DIAMETER_PX at dot_size 50,
+  // FRAME_PX, RASTER_PAD_PX, FRAME_MARGIN), scaled to the canvas
+  const PITCH = 110, DIAMETER = 47.3, FRAME = 3, PAD = 27, FRAME_MARGIN = 0.05;
+
+  function draw(canvas, red, gridSize) {
+    const ratio = window.devicePixelRatio || 1;
+    const size = canvas.clientWidth || canvas.width;
+    canvas.width = canvas.height = Math.round(size * ratio);
+    const ctx = canvas.getContext('2d');
+    const margin = Math.max(0, Math.round(FRAME_MARGIN * (gridSize - 1) * PITCH - PITCH / 2));
+    const inner = gridSize * PITCH + 2 * margin;
+    const scale = canvas.width / (inner + 2 * (FRAME + PAD));
+    const origin = PAD + FRAME + margin;
+
+    ctx.setTransform(scale, 0, 0, scale, 0, 0);
+    ctx.fillStyle = '#ffffff';
+    ctx.fillRect(0, 0, canvas.width / scale, canvas.height / scale);
+    ctx.fillStyle = '#000000';
+    ctx.fillRect(PAD, PAD, inner + 2 * FRAME, inner + 2 * FRAME);
+    ctx.fillStyle = '#ffffff';
+    ctx.fillRect(PAD + FRAME, PAD + FRAME, inner, inner);
+    for (let i = 0; i < red.length; i++) {
+      const row = Math.floor(i / gridSize), col = i % gridSize;
+      ctx.beginPath();
+      ctx.arc(origin + (col + 0.5) * PITCH, origin + (row + 0.5) * PITCH, DIAMETER / 2, 0, 2 * Math.PI);
+      ctx.fillStyle = red[i] ? '#ff0000' : '#0000ff';
+      ctx.fill();
+    }
+  }
+
+  window.dotGrid = {layout: layout, toHex: toHex, draw: draw};
+})();
@@ -0,0 +1,30 @@
+// Client-side page timing. performance.now() marks are written into hidden inputs on submit:
+//   data-timing="page"      ms from render to submit
+//   data-timing="image"     ms from render until the stimulus image is visible
+//   data-timing="exposure"  ms from image visible to submit
+// Pages that submit programmatically (form.submit() skips the submit event) call pageTiming.fill().
+(function () {
+  const marks = {render: performance.now(), image: null};
+
+  function fill() {
+    const now = performance.now();
+    const values = {
+      page: now - marks.render,
+      image: marks.image === null ? null : marks.image - marks.render,
+      exposure: marks.image === null ? null : now - marks.image,
+    };
+    document.querySelectorAll('input[data-timing]').forEach(function (input) {
+      const v = values[input.dataset.timing];
+      input.value = (v === null || v === undefined) ? '' : Math.round(v);
+    });
+  }
+
+  window.pageTiming = {
+    // first mark wins, so repeated events don't move it
+    mark: function (name) {
+      if (marks[name] === null) marks[name] = performance.now();
+    },
+    fill: fill,
+  };
+  document.addEventListener('submit', fill, true);
+})();
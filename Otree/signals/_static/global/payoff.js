@@ -0,0 +1,124 @@
+// Payoff table and live c2 preview for the Choice / IncomeInfo / ChoiceBelief pages, rendered from the
+// compact parameters in js_vars.payoff (helper_functions.build_js_vars_choice):
+//   {y1, y2, p1, R, c1_max, pis}
+// Markup hooks:
+//   table[data-payoff-table]   tbody is filled with one row per integer c1 (u per π, "—" if infeasible)
+//   [data-pi="i"]              shows pis[i]
+//   [data-c2-pi="i"]           live c2 at pis[i] for the value of #c1_slider
+//   [data-u-pi="i"]            u at pis[i], as answered by the server
+// The formulas mirror helper_functions.calc_c2 and _compute_payoff_table; this is the only JS copy.
+//
+// On pages with a live_method (helper_functions.live_payoff_preview) the c1 the participant settles
+// on, from the slider or a clicked table row, is sent as {c1, ms} once it has not changed for
+// DEBOUNCE_MS; the reply fills the previews and the server logs the probe.
+(function () {
+  const DEBOUNCE_MS = 250;
+  function calcC2(y1, y2, p1, p2, c1, R) {
+    return y2 + R * (y1 - p1 * c1) / p2;
+  }
+
+  // np.round(x, 2): ties go to the even neighbour, unlike Math.round
+  function round2(x) {
+    const y = x * 100;
+    let r = Math.round(y);
+    if (r - y === 0.5 && r % 2 !== 0) r -= 1;
+    return r / 100;
+  }
+
+  // c2 and u = c1 * c2 at price level pi, or null where c2 < 1 (infeasible)
+  function outcome(params, c1, pi) {
+    const c2 = calcC2(params.y1, params.y2, params.p1, pi * params.p1, c1, params.R);
+    return c2 < 1 ? null : {c2: c2, u: round2(c1 * c2)};
+  }
+
+  function renderTable(table, params) {
+    const rows = [];
+    for (let c1 = 1; c1 <= Math.floor(params.c1_max); c1++) {
+      const cells = params.pis.map(function (pi) {
+        const o = outcome(params, c1, pi);
+        return '<td>' + (o ? o.u : '—') + '</td>';
+      });
+      rows.push('<tr data-c1="' + c1 + '"><td>' + c1 + '</td>' + cells.join('') + '</tr>');
+    }
+    table.tBodies[0].innerHTML = rows.join('');
+  }
+
+  function highlight(tables, c1, all) {
+    // tables marked data-highlight follow the slider
+    tables.forEach(function (table) {
+      if (!all && !('highlight' in table.dataset)) return;
+      Array.from(table.tBodies[0].rows).forEach(function (tr) {
+        tr.classList.toggle('table-warning', Number(tr.dataset.c1) === Math.round(c1));
+      });
+    });
+  }
+
+  // Debounced liveSend of c1; a no-op on pages without a live_method
+  function makeProbe() {
+    if (typeof liveSend !== 'function') return function () {};
+    let timer = null;
+    let last = null;
+    return function (c1) {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        if (c1 === last) return;
+        last = c1;
+        liveSend({c1: c1, ms: Math.round(performance.now())});
+      }, DEBOUNCE_MS);
+    };
+  }
+
+  function showReply(reply) {
+    reply.outcomes.forEach(function (o, i) {
+      document.querySelectorAll('[data-c2-pi="' + i + '"]').forEach(function (el) {
+        el.textContent = o ? o.c2.toFixed(2) : '—';
+      });
+      document.querySelectorAll('[data-u-pi="' + i + '"]').forEach(function (el) {
+        el.textContent = o ? o.u.toFixed(2) : '—';
+      });
+    });
+  }
+
+  function init(params) {
+    document.querySelectorAll('[data-pi]').forEach(function (el) {
+      el.textContent = params.pis[el.dataset.pi];
+    });
+    const tables = document.querySelectorAll('table[data-payoff-table]');
+    tables.forEach(function (table) { renderTable(table, params); });
+    const probe = makeProbe();
+    window.liveRecv = showReply;
+
+    const slider = document.getElementById('c1_slider');
+    if (!slider) {
+      // No choice on this page: clicking a table row previews that c1
+      tables.forEach(function (table) {
+        table.tBodies[0].addEventListener('click', function (e) {
+          const tr = e.target.closest('tr[data-c1]');
+          if (!tr) return;
+          highlight(tables, Number(tr.dataset.c1), true);
+          probe(Number(tr.dataset.c1));
+        });
+      });
+      return;
+    }
+    const out = document.getElementById('c1_out');
+    const previews = document.querySelectorAll('[data-c2-pi]');
+
+    function update() {
+      // keep slider within [1, c1_max] just in case
+      const c1 = Math.min(Math.max(parseFloat(slider.value || 1), 1), params.c1_max);
+      out.value = c1.toFixed(2);
+      previews.forEach(function (el) {
+        const o = outcome(params, c1, params.pis[el.dataset.c2Pi]);
+        el.textContent = o ? o.c2.toFixed(2) : '—';
+      });
+      highlight(tables, c1, false);
+      return c1;
+    }
+
+    update();
+    slider.addEventListener('input', function () { probe(update()); });
+  }
+
+  window.payoff = {calcC2: calcC2, outcome: outcome, init: init};
+})();
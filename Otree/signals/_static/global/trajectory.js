@@ -0,0 +1,84 @@
+// Slider trajectories for the hidden input[data-trajectory="<slider id>"]: the slider's value at
+// render (ms 0) and every change after it, with ms offsets from render. On submit the samples are
+// written into the hidden input as base64 of unsigned LEB128 varints, alternating zigzag(Δvalue)
+// and Δms (decoded by helper_functions.decode_trajectory, which also documents the format).
+// Values are rounded to integers; the pages use step="1" sliders.
+(function () {
+  // Encoded size cap: helper_functions.TRAJECTORY_MAX_CHARS (8192) base64 characters = 6144 bytes.
+  // Once a new sample would not fit in MAX_BYTES - RESERVE, later changes only update the last
+  // sample, which the reserve (two 10-byte varints at most) always leaves room for.
+  const MAX_BYTES = 6144;
+  const RESERVE = 20;
+  const render = performance.now();
+  const recorders = [];
+
+  function varintLength(n) {
+    let length = 1;
+    while (n >= 0x80) {
+      n = Math.floor(n / 128);
+      length++;
+    }
+    return length;
+  }
+
+  // Encoded bytes of sample s after sample prev (or after [0, 0] for the first)
+  function cost(s, prev) {
+    const dv = s[0] - prev[0];
+    return varintLength(dv >= 0 ? 2 * dv : -2 * dv - 1) + varintLength(s[1] - prev[1]);
+  }
+
+  function varint(bytes, n) {
+    while (n >= 0x80) {
+      bytes.push((n & 0x7f) | 0x80);
+      n = Math.floor(n / 128);
+    }
+    bytes.push(n);
+  }
+
+  function encode(samples) {
+    const bytes = [];
+    let value = 0;
+    let ms = 0;
+    samples.forEach(function (s) {
+      const dv = s[0] - value;
+      varint(bytes, dv >= 0 ? 2 * dv : -2 * dv - 1);  // zigzag
+      varint(bytes, s[1] - ms);
+      value = s[0];
+      ms = s[1];
+    });
+    return btoa(String.fromCharCode.apply(null, bytes));
+  }
+
+  function record(input) {
+    const slider = document.getElementById(input.dataset.trajectory);
+    if (!slider) return;
+    const samples = [[Math.round(Number(slider.value)), 0]];
+    const costs = [cost(samples[0], [0, 0])];
+    let bytes = costs[0];
+
+    slider.addEventListener('input', function () {
+      const value = Math.round(Number(slider.value));
+      const last = samples.length - 1;
+      const ms = Math.max(Math.round(performance.now() - render), samples[last][1]);
+      if (value === samples[last][0]) return;
+      const sample = [value, ms];
+      const added = cost(sample, samples[last]);
+      if (bytes + added <= MAX_BYTES - RESERVE) {
+        samples.push(sample);
+        costs.push(added);
+        bytes += added;
+      } else if (last > 0) {
+        const replaced = cost(sample, samples[last - 1]);
+        bytes += replaced - costs[last];
+        samples[last] = sample;
+        costs[last] = replaced;
+      }
+    });
+    recorders.push(function () { input.value = encode(samples); });
+  }
+
+  document.querySelectorAll('input[data-trajectory]').forEach(record);
+  document.addEventListener('submit', function () {
+    recorders.forEach(function (fill) { fill(); });
+  }, true);
+})();
@@ -0,0 +1,82 @@
+"""
+Benchmark schedule generation for the four treatments: per-player random.shuffle (the
+previous create_session) versus participant_permutations, which draws every participant's
+seeded block of the treatment stream in one vectorized pass. The last column is the complete
+round-1 create_session, including the master seed and per-round field assignment.
+
+    python benchmarks/bench_create_session.py [N ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helper_functions import (  # noqa: E402
+    create_session,
+    get_design,
+    get_income_profile,
+    get_red_counts,
+    participant_permutations,
+    permutation_index,
+    synthesize_filenames,
+)
+
+C = SimpleNamespace(P1=1.0, R=1.0)
+
+
+def make_subsession(n_players, round_number=1):
+    session = SimpleNamespace(config={}, vars={})
+    players = [
+        SimpleNamespace(participant=SimpleNamespace(vars={}, id_in_session=i), session=session)
+        for i in range(1, n_players + 1)
+    ]
+    return SimpleNamespace(round_number=round_number, session=session, get_players=lambda: players)
+
+
+def legacy_shuffle(subsession, treatment):
+    pairs = [(r, y1) for y1 in get_income_profile() for r in get_red_counts()]
+    image_files_master = synthesize_filenames(get_red_counts(), None)
+    for p in subsession.get_players():
+        combined = list(zip(pairs, image_files_master))
+        random.shuffle(combined)
+        schedule, images = zip(*combined)
+        p.participant.vars[f"{treatment}_schedule"] = list(schedule)
+        p.participant.vars[f"{treatment}_images"] = list(images)
+
+
+def vectorized_shuffle(subsession, treatment):
+    players = subsession.get_players()
+    perms = participant_permutations(players, treatment, len(get_design()))
+    for p, index in zip(players, permutation_index(perms)):
+        p.participant.vars[f"{treatment}_perm"] = index
+
+
+def full_create_session(subsession, treatment):
+    create_session(subsession, C, treatment)
+
+
+def bench(fn, n_players, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        subsession = make_subsession(n_players)
+        start = time.perf_counter()
+        for treatment in ("t0", "t1", "t3", "t4"):
+            fn(subsession, treatment)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes):
+    print(f"{'N':>8} {'legacy [s]':>12} {'seeded [s]':>12} {'speedup':>8} {'create_session [s]':>19}")
+    for n in sizes:
+        legacy = bench(legacy_shuffle, n)
+        vectorized = bench(vectorized_shuffle, n)
+        full = bench(full_create_session, n)
+        print(f"{n:>8} {legacy:>12.4f} {vectorized:>12.4f} {legacy / vectorized:>7.1f}x {full:>19.4f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 1_000, 10_000])
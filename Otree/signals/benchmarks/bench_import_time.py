@@ -0,0 +1,83 @@
+"""
+Import-time budget for loading the project the way an oTree server process does: a fresh
+interpreter under `python -X importtime` imports otree.api (the baseline, not counted), then
+settings and every app of SESSION_CONFIGS. Fails when the project's share exceeds the budget
+(median over the runs) or when any of the tooling-only libraries gets imported at all.
+
+    python benchmarks/bench_import_time.py [--budget-ms 300] [--runs 5]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MARKER = "--- project load ---"
+# Used by tools/ only; a server process must never pay for them
+FORBIDDEN = ("matplotlib", "pandas", "openpyxl", "PIL", "scipy")
+
+LOADER = f"""
+import importlib, sys
+import otree.api
+sys.stderr.write({MARKER!r} + "\\n")
+import settings
+for app in dict.fromkeys(app for c in settings.SESSION_CONFIGS for app in c["app_sequence"]):
+    importlib.import_module(app)
+"""
+
+
+def measure():
+    """One cold load: (project ms, {module: self ms} of the project part, all imported module names)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", LOADER],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    lines = result.stderr.splitlines()
+    start = lines.index(MARKER)
+    modules = set()
+    project_us = 0
+    self_us = {}
+    for i, line in enumerate(lines):
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue  # column header
+        modules.add(name.strip().split(".")[0])
+        if i > start:
+            self_us[name.strip()] = int(self_time)
+            if not name[1:].startswith(" "):  # top level: cumulative covers its imports
+                project_us += int(cumulative)
+    return project_us / 1000, {k: v / 1000 for k, v in self_us.items()}, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=300.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    totals = [total for total, _, _ in runs]
+    median = statistics.median(totals)
+    _, self_ms, modules = min(runs, key=lambda run: abs(run[0] - median))
+
+    print(f"project load: median {median:.1f} ms, min {min(totals):.1f} ms over {args.runs} run(s); "
+          f"budget {args.budget_ms:.0f} ms")
+    print(f"{'module':<40} {'self ms':>8}")
+    for name, ms in sorted(self_ms.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<40} {ms:>8.1f}")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"project load takes {median:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    failures += [f"{name} is imported at startup" for name in FORBIDDEN if name in modules]
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
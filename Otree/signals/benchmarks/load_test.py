@@ -0,0 +1,195 @@
+"""
+HTTP load test for the 'signals' session config against a running server.
+
+Start a server first, e.g. `otree devserver` (SQLite) or `otree prodserver 8000` with
+DATABASE_URL pointing at a local Postgres, then:
+
+    python benchmarks/load_test.py --participants 50 200 1000
+
+Every simulated participant is a requests.Session that walks the whole app_sequence,
+submitting the values pre-filled in each form (sliders) and the correct answers for the
+comprehension test. A fixed pool of worker threads steps participants round-robin, so
+participants parked on wait pages never block the others. Reports latency percentiles
+per page and overall throughput.
+
+For functional checks, including invalid submissions, run the bots: `otree test signals`.
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+WAIT_PAGE_HEADER = 'oTree-Wait-Page'
+WAIT_POLL_SECONDS = 0.25
+
+
+class FormParser(HTMLParser):
+    """Collects the default value of every form input, plus whether a submit button exists."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = {}
+        self.has_submit_button = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'button' and attrs.get('type', 'submit') == 'submit':
+            self.has_submit_button = True
+        if tag != 'input' or not attrs.get('name'):
+            return
+        if attrs.get('type') in ('radio', 'checkbox') and 'checked' not in attrs:
+            return
+        self.values[attrs['name']] = attrs.get('value', '')
+
+
+def comprehension_answers():
+    with open(ROOT / 'intro' / 'questions.cache.json', encoding='utf-8') as f:
+        questions = json.load(f)['questions']
+    return {f'q{i + 1}': q['correct'] for i, q in enumerate(questions)}
+
+
+class Participant:
+    def __init__(self, server, code):
+        self.http = requests.Session()
+        self.start_url = f'{server}/InitializeParticipant/{code}'
+        self.response = None
+        self.not_before = 0.0
+        self.done = False
+
+
+class LoadTest:
+    def __init__(self, server, rest_key=None):
+        self.server = server.rstrip('/')
+        self.headers = {'otree-rest-key': rest_key} if rest_key else {}
+        self.answers = comprehension_answers()
+        self.timings = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def create_session(self, n):
+        response = requests.post(
+            f'{self.server}/api/sessions',
+            json=dict(session_config_name='signals', num_participants=n),
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        code = response.json()['code']
+        info = requests.get(f'{self.server}/api/sessions/{code}', headers=self.headers)
+        info.raise_for_status()
+        return [p['code'] for p in info.json()['participants']]
+
+    def run(self, n, concurrency):
+        participants = [Participant(self.server, code) for code in self.create_session(n)]
+        self.timings.clear()
+        pending = queue.Queue()
+        for p in participants:
+            pending.put(p)
+
+        remaining = [len(participants)]
+        errors = []
+
+        def worker():
+            while True:
+                p = pending.get()
+                if p is None:
+                    return
+                delay = p.not_before - time.monotonic()
+                if delay > 0:
+                    time.sleep(min(delay, WAIT_POLL_SECONDS))
+                try:
+                    self.step(p)
+                except Exception as exc:  # report and drop the participant
+                    errors.append(exc)
+                    p.done = True
+                if p.done:
+                    with self.lock:
+                        remaining[0] -= 1
+                        if remaining[0] == 0:
+                            for _ in range(concurrency):
+                                pending.put(None)
+                else:
+                    pending.put(p)
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.monotonic() - start, errors
+
+    def step(self, p):
+        if p.not_before > time.monotonic():
+            return
+        if p.response is None:
+            p.response = self.timed('start', p.http.get, p.start_url)
+            return
+        page = page_name(p.response.url)
+        if p.response.headers.get(WAIT_PAGE_HEADER) == '1':
+            p.response = self.timed(f'{page} (wait poll)', p.http.get, p.response.url)
+            p.not_before = time.monotonic() + WAIT_POLL_SECONDS
+            return
+
+        form = FormParser()
+        form.feed(p.response.text)
+        if not form.has_submit_button:
+            p.done = True  # Final page
+            return
+        data = dict(form.values)
+        if page.endswith('ComprehensionTest'):
+            data.update(self.answers)
+        p.response = self.timed(page, p.http.post, p.response.url, data=data)
+        p.response.raise_for_status()
+
+    def timed(self, label, method, *args, **kwargs):
+        start = time.perf_counter()
+        response = method(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.timings[label].append(elapsed)
+        return response
+
+
+def page_name(url):
+    # /p/<code>/<app>/<Page>/<index>
+    parts = urlsplit(url).path.strip('/').split('/')
+    return '/'.join(parts[2:4]) if len(parts) >= 4 else urlsplit(url).path
+
+
+def report(n, wall, timings, errors):
+    total = sum(len(v) for v in timings.values())
+    print(f'\n=== {n} participants: {total} requests in {wall:.1f} s '
+          f'({total / wall:.1f} req/s), {len(errors)} error(s)')
+    print(f"{'page':<36} {'n':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label in sorted(timings):
+        ms = np.array(timings[label]) * 1000
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        print(f'{label:<36} {ms.size:>6} {p50:>8.1f} {p90:>8.1f} {p99:>8.1f} {ms.max():>8.1f}')
+    for exc in errors[:5]:
+        print(f'  error: {exc!r}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', default='http://127.0.0.1:8000')
+    parser.add_argument('--participants', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--concurrency', type=int, default=32, help='worker threads')
+    args = parser.parse_args(argv)
+
+    test = LoadTest(args.server, os.environ.get('OTREE_REST_KEY'))
+    for n in args.participants:
+        wall, errors = test.run(n, args.concurrency)
+        report(n, wall, test.timings, errors)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,52 +1,152 @@
-import matplotlib.pyplot as plt
-import numpy as np
+"""
+Dot-grid stimuli at runtime: the seeded layout, its compact hex form and a NumPy raster (full or
+display size) with PNG encoding and decoding. The apps import this lazily (stimulus_mode
+'on_demand' and 'canvas'); building and publishing the static images is tools/stimuli.py.
+"""
 import random
+import struct
+import zlib
+from functools import lru_cache
+
+import numpy as np
 
+# Geometry of the shipped stimuli (_static/dots_T0_120_x1.png, 300 dpi): dots 110 px apart and
+# 47.3 px across (area-equivalent) at dot_size 50, inside a 3 px black frame that runs 0.05 of the
+# centre span beyond the outer dots, with a white border around the frame
+RASTER_DPI = 300
+RASTER_PAD_PX = 27
+DOT_PITCH_PX = 110
+DOT_DIAMETER_PX = 47.3
+FRAME_PX = 3
+FRAME_MARGIN = 0.05
+RGB = {"white": (255, 255, 255), "red": (255, 0, 0), "blue": (0, 0, 255), "black": (0, 0, 0)}
+# 4-bit palette of the served images (tools.stimuli publish and the on_demand renders): white, the
+# black/grey frame of the matplotlib output and 5 anti-aliasing steps from white towards red and blue
+PALETTE = tuple([RGB["white"], (204, 204, 204), (128, 128, 128), (51, 51, 51), RGB["black"]] + [
+    tuple(round(w + (c - w) * step / 5) for w, c in zip(RGB["white"], RGB[color]))
+    for color in ("red", "blue")
+    for step in range(1, 6)
+])
 
-def create_dot_grid(n_red=120, grid_size=20, dot_size=50, filename="grid.png"):
+
+def dot_layout(n_red, grid_size=20, seed=None):
+    """Boolean mask over the grid (row-major, top-left first), True where a dot is red."""
     # Total dots
     total_dots = grid_size * grid_size
 
     if n_red > total_dots:
         raise ValueError("Number of red dots exceeds total grid size")
 
-    # Assign colors
-    colors = ["blue"] * total_dots
-    red_indices = random.sample(range(total_dots), n_red)
-    for idx in red_indices:
-        colors[idx] = "red"
+    # A fixed seed reproduces the same layout; _static/global/dot_grid.js ports this exact draw
+    red = np.zeros(total_dots, dtype=bool)
+    red[random.Random(seed).sample(range(total_dots), n_red)] = True
+    return red
+
+
+def layout_hex(red):
+    """Compact form of a dot_layout mask (bits packed MSB first, as hex), as sent back by dot_grid.js."""
+    return np.packbits(red).tobytes().hex()
+
+
+# ---- NumPy backend --------------------------------------------------------------------------------------------------
+def render_dot_grid(n_red=120, grid_size=20, dot_size=50, seed=None, scale=1.0, palette=None):
+    """
+    Rasterize the grid straight into an RGB uint8 array, without matplotlib.
+    Every cell is a copy of one of two precomputed, anti-aliased tiles, so the whole
+    image is a single vectorized select plus a reshape; the margin, frame and border are pads.
+    scale shrinks every length (0.34 gives the 800 px display size). With palette (a tuple
+    of RGB triples holding white and black, e.g. PALETTE) the tiles are snapped to their
+    nearest palette colours and the result is an (H, W) array of palette indices.
+    """
+    red = dot_layout(n_red, grid_size, seed).reshape(grid_size, grid_size)
+    tile_red, tile_blue = _dot_tile(dot_size, "red", scale, palette), _dot_tile(dot_size, "blue", scale, palette)
+    pitch = tile_red.shape[0]
+    channels = tile_red.shape[2:]
+
+    cells = np.where(red.reshape(red.shape + (1,) * tile_red.ndim), tile_red, tile_blue)
+    grid = cells.swapaxes(1, 2).reshape((grid_size * pitch, grid_size * pitch) + channels)
+    # The frame sits FRAME_MARGIN of the centre span beyond the outer centres, half a pitch of it in the tiles
+    margin = max(0, round(FRAME_MARGIN * (grid_size - 1) * pitch - pitch / 2))
+    frame = max(1, round(FRAME_PX * scale))
+    for width, color in ((margin, "white"), (frame, "black"), (round(RASTER_PAD_PX * scale), "white")):
+        if palette is not None:
+            grid = np.pad(grid, width, constant_values=palette.index(RGB[color]))
+        else:
+            grid = np.stack([np.pad(grid[:, :, c], width, constant_values=v) for c, v in enumerate(RGB[color])], axis=2)
+    return grid
+
+
+@lru_cache(maxsize=None)
+def _dot_tile(dot_size, color, scale=1.0, palette=None):
+    # matplotlib's marker size is an area, so the diameter scales with its square root
+    diameter = DOT_DIAMETER_PX * scale * (dot_size / 50) ** 0.5
+    pitch = max(1, round(DOT_PITCH_PX * scale))
+
+    # Pixel coverage of the disc, approximated by the distance to its edge
+    centres = np.arange(pitch) + 0.5 - pitch / 2
+    dist = np.hypot(centres[:, None], centres[None, :])
+    alpha = np.clip(diameter / 2 + 0.5 - dist, 0.0, 1.0)[:, :, None]
 
-    # Create grid coordinates
-    x, y = np.meshgrid(range(grid_size), range(grid_size))
-    x, y = x.flatten(), y.flatten()
+    tile = np.array(RGB["white"]) * (1 - alpha) + np.array(RGB[color]) * alpha
+    if palette is None:
+        tile = np.round(tile).astype(np.uint8)
+    else:
+        # Nearest palette colour, without dithering, as tools.stimuli publishes the static images
+        distance = ((tile[:, :, None, :] - np.array(palette)[None, None]) ** 2).sum(axis=3)
+        tile = distance.argmin(axis=2).astype(np.uint8)
+    tile.setflags(write=False)
+    return tile
 
-    # Plot
-    plt.figure(figsize=(4, 4))
-    plt.scatter(x, y, c=colors, s=dot_size)
-    plt.gca().invert_yaxis()  # Optional: put (0,0) at top-left
-    plt.axis("off")
-    plt.savefig(filename, dpi=300, bbox_inches="tight")
-    plt.close()
 
-# counts = [120, 185, 190, 195, 199, 201, 205, 210, 215, 280]
-# alph = ["x=05", "x=15"]
-# # Example usage
-# for elem in alph:
-#     for count in counts:
-#         create_dot_grid(n_red=count, filename="_static/dots_T0_" + str(count) + "_" + str(elem) + ".png")
-#
+def encode_png(pixels, palette=None):
+    """
+    Encode an (H, W, 3) uint8 array as an 8-bit RGB PNG, or with palette an (H, W) array of
+    indices into it (as render_dot_grid returns them) as an 8-bit palette PNG.
+    """
+    height, width = pixels.shape[:2]
+    channels = 3 if palette is None else 1
+    # Every scanline starts with filter type 0 (None)
+    raw = np.zeros((height, width * channels + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, width * channels)
 
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
 
-import pandas as pd
+    header = struct.pack(">IIBBBBB", width, height, 8, 2 if palette is None else 3, 0, 0, 0)
+    ppm = round(RASTER_DPI / 0.0254)  # pixels per metre
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + (b"" if palette is None else chunk(b"PLTE", bytes(c for rgb in palette for c in rgb)))
+        + chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
 
-# Input and output filenames
-input_file = "Test2.csv"
-output_file = "Test_german.csv"
 
-# Read the original CSV (comma-delimited, dot decimals)
-df = pd.read_csv(input_file)
+def decode_png(data):
+    """
+    Decode an 8-bit RGB or palette PNG whose scanlines are all unfiltered (filter type 0), as
+    encode_png and the shipped stimuli write them, into an (H, W, 3) uint8 array.
+    """
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("Not a PNG file")
+    chunks, pos = {}, 8
+    while pos < len(data):
+        (length,), kind = struct.unpack(">I", data[pos:pos + 4]), data[pos + 4:pos + 8]
+        chunks[kind] = chunks.get(kind, b"") + data[pos + 8:pos + 8 + length]
+        pos += 12 + length
 
-# Save again with German-style formatting
-df.to_csv(output_file, sep=';', decimal=',', index=False)
+    width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", chunks[b"IHDR"])
+    channels = {2: 3, 3: 1}.get(color_type)
+    if depth != 8 or channels is None or interlace:
+        raise ValueError("Only 8-bit, non-interlaced RGB or palette PNGs are supported")
+    raw = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(height, width * channels + 1)
+    if raw[:, 0].any():
+        raise ValueError("Only unfiltered scanlines are supported")
 
-print(f"Converted file saved as {output_file}")
+    pixels = raw[:, 1:].reshape(height, width, channels)
+    if color_type == 3:
+        palette = np.frombuffer(chunks[b"PLTE"], dtype=np.uint8).reshape(-1, 3)
+        pixels = palette[pixels[:, :, 0]]
+    return np.ascontiguousarray(pixels)
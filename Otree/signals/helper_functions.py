@@ -1,7 +1,22 @@
+import base64
+import hashlib
 import itertools
-import random
+import json
+import math
+import os
+import re
+import time
+import zlib
+from array import array
+from bisect import bisect_right
 from enum import Enum
+from functools import lru_cache
 from math import floor
+from pathlib import Path
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
 
 
 class Price(Enum):
@@ -11,42 +26,315 @@ class Price(Enum):
 
 # --- template helpers -----------------------------------------------------------------------------------------------
 def create_session(subsession, C, treatment):
+    design = get_design(C.P1, C.R)
+    players = subsession.get_players()
+
+    # Shuffle the design rows in the first round, from every player's own seeded stream.
+    # Only the permutation's index is stored; rows are looked up from the shared design.
+    if subsession.round_number == 1:
+        perms = participant_permutations(players, treatment, len(design))
+        for p, index in zip(players, permutation_index(perms)):
+            p.participant.vars[f"{treatment}_perm"] = index
+        assign_stimulus_seeds(players)
+
+    # For each participant, copy this round's design row
+    for p in players:
+        assign_design_row(p, scheduled(design, p.participant.vars[f"{treatment}_perm"], subsession.round_number))
+        assign_image_seed(p, treatment, subsession.round_number)
+
+
+class DesignRow(NamedTuple):
+    """One round's parameters with everything derived from them, shared by all treatments."""
+    red_count: int
+    y1: int
+    y2: int
+    h_true: float  # red_count / 400
+    pi: float
+    p2: float
+    c1_max: float
+    image_file: str
+    payoff_table: tuple  # build_payoff_table rows
+
+
+# DesignRow fields every treatment's Player stores
+DESIGN_FIELDS = ("red_count", "y1", "y2", "h_true", "pi", "p2", "c1_max", "image_file")
+
+
+@lru_cache(maxsize=None)
+def get_design(p1=1.0, R=1.0):
+    """
+    The design table: every (red_count, y1) round parameter in canonical order, each red count
+    once with every income profile and paired with its image, plus the derived fields and payoff
+    table for prices p1 and gross return R. Built once per (p1, R) and shared read-only;
+    schedules are permutations of it, so assigning a round is one lookup.
+    """
     # Build 20 pairs (r, x): each r appears once with x=0.5 and once with x=2
-    pairs = list(itertools.product(get_income_profile(), get_red_counts()))
-    pairs = [(y, y1) for (y1, y) in pairs]
+    pairs = [(r, y1) for y1 in get_income_profile() for r in get_red_counts()]
     # Precompute a 20-item image list if explicit files not provided
     # Replace with C.IMAGE_FILES if custom file names are necessary
     image_files_master = synthesize_filenames(get_red_counts(), None)
+    rows = []
+    for (r, y1), image in zip(pairs, image_files_master):
+        y2 = second_income(y1)
+        pi = Price.HIGH.value if r > 200 else Price.LOW.value
+        c1_max = _c1_max(y1, y2)
+        rows.append(DesignRow(
+            red_count=int(r), y1=y1, y2=y2, h_true=r / 400.0, pi=pi, p2=pi * p1, c1_max=c1_max,
+            image_file=image, payoff_table=build_payoff_table(y1, y2, p1, R, c1_max),
+        ))
+    return tuple(rows)
+
+
+def assign_design_row(p, row):
+    for name in DESIGN_FIELDS:
+        setattr(p, name, getattr(row, name))
+
+
+# ---- random streams -------------------------------------------------------------------------------------------------
+def session_master_seed(session):
+    """
+    The session's master seed: session config master_seed, or fresh entropy when that is None.
+    Fixed on first use and kept in session.vars, so every draw of the session can be replayed.
+    """
+    seed = session.vars.get("master_seed")
+    if seed is None:
+        seed = session.config.get("master_seed")
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        session.vars["master_seed"] = seed = int(seed)
+    return seed
+
+
+def stream_uniforms(master_seed, stream, ids_in_session, n):
+    """
+    (len(ids_in_session), n) uniforms from the stream (an app or purpose, e.g. "t4_roles").
+    Each stream is one Philox sequence keyed on SeedSequence(master_seed) with the stream in the
+    spawn key, and participant i always gets block i of it. A chunk of participants is a single
+    draw after skipping to its lowest id, and every row only depends on (seed, stream, id): any
+    order or chunking, and tools.replay offline, give the same values.
+    """
+    ids = np.asarray(ids_in_session, dtype=np.int64)
+    if not ids.size:
+        return np.zeros((0, n))
+    width = -(-n // 4) * 4  # whole Philox outputs (4 doubles) per participant, so blocks align
+    bitgen = np.random.Philox(np.random.SeedSequence(master_seed, spawn_key=(zlib.crc32(stream.encode()),)))
+    low = int(ids.min())
+    bitgen.advance((low - 1) * width // 4)
+    block = np.random.Generator(bitgen).random((int(ids.max()) - low + 1, width))
+    return block[ids - low, :n]
+
+
+def player_uniforms(players, stream, n):
+    """stream_uniforms for players of one session."""
+    if not players:
+        return np.zeros((0, n))
+    master_seed = session_master_seed(players[0].session)
+    return stream_uniforms(master_seed, stream, [p.participant.id_in_session for p in players], n)
+
+
+def participant_permutations(players, stream, n_items):
+    """One permutation of range(n_items) per player, from the player's block of the stream."""
+    return np.argsort(player_uniforms(players, stream, n_items), axis=1)
+
+
+def seeded_permutations(master_seed, ids_in_session, stream, n_items):
+    """participant_permutations by participant id, e.g. for tools.replay."""
+    return np.argsort(stream_uniforms(master_seed, stream, ids_in_session, n_items), axis=1)
+
+
+def permutation_index(perms):
+    """
+    Lexicographic rank (Lehmer code) of each row of an (n_players, n) permutation array.
+    A single int per participant replaces the materialized schedule list (n <= 20 fits int64).
+    """
+    n = perms.shape[1]
+    # digit i = how many of the later entries are smaller than entry i
+    later_smaller = perms[:, None, :] < perms[:, :, None]
+    digits = np.triu(later_smaller, k=1).sum(axis=2)
+    weights = np.array([math.factorial(n - 1 - i) for i in range(n)], dtype=np.int64)
+    return (digits * weights).sum(axis=1).tolist()
+
+
+@lru_cache(maxsize=4096)
+def permutation_from_index(index, n):
+    """Inverse of permutation_index for one participant."""
+    remaining = list(range(n))
+    perm = []
+    for i in range(n - 1, -1, -1):
+        digit, index = divmod(index, math.factorial(i))
+        perm.append(remaining.pop(digit))
+    return tuple(perm)
+
+
+def scheduled(items, index, round_number):
+    """The item a participant sees in round_number, given their stored permutation index."""
+    return items[permutation_from_index(index, len(items))[round_number - 1]]
+
+
+# stimulus_mode values that draw a fresh layout per participant and round from image_seed
+SEEDED_STIMULUS_MODES = ("on_demand", "canvas")
+STIMULUS_GRID_SIZE = 20
+
+
+def assign_image_seed(p, treatment, round_number):
+    """
+    With session config stimulus_mode='on_demand' or 'canvas', every participant gets a freshly
+    seeded layout per round instead of one of the shared files in _static. Only one seed per
+    participant is stored; per-round seeds are derived from it.
+    """
+    if p.session.config.get("stimulus_mode", "static") not in SEEDED_STIMULUS_MODES:
+        return
+    assign_stimulus_seeds([p])
+    p.image_seed = derive_seed(p.participant.vars["stimulus_seed"], treatment, round_number)
+
+
+def assign_stimulus_seeds(players):
+    """Draw the stimulus_seed of every player that has none yet in one pass (seeded modes only)."""
+    players = [p for p in players if "stimulus_seed" not in p.participant.vars]
+    if not players or players[0].session.config.get("stimulus_mode", "static") not in SEEDED_STIMULUS_MODES:
+        return
+    for p, u in zip(players, player_uniforms(players, "stimulus", 1)[:, 0]):
+        p.participant.vars["stimulus_seed"] = int(u * 2 ** 31)
+
+
+def derive_seed(seed, treatment, round_number):
+    state = np.random.SeedSequence([seed, zlib.crc32(treatment.encode()), round_number]).generate_state(1)
+    return int(state[0] >> 1)  # fits an IntegerField
+
+
+def build_vars_for_template_signal(player, C):
+    mode = player.session.config.get("stimulus_mode", "static")
+    seed = player.field_maybe_none("image_seed")
+    return dict(
+        image_file=player.image_file,
+        stimulus=stimulus_picture(player.image_file),
+        # Rendered at display size on first request, then served as a cacheable static file
+        image_src=seeded_stimulus_url(player.red_count, seed) if mode == "on_demand" else None,
+        # Drawn in the browser by global/dot_grid.js, so only these three numbers are sent
+        canvas=dict(red_count=player.red_count, grid_size=STIMULUS_GRID_SIZE, seed=seed) if mode == "canvas" else None,
+        show_seconds=C.SIGNAL_SHOW_SECONDS,
+    )
+
+
+def verify_canvas_layout(player):
+    """
+    With stimulus_mode='canvas', check the layout the browser drew (signal_layout, sent by
+    dot_grid.js) against dots.dot_layout, so a drifted JS port cannot go unnoticed in the data.
+    """
+    if player.session.config.get("stimulus_mode", "static") != "canvas":
+        return
+    from dots import dot_layout, layout_hex
+
+    expected = layout_hex(dot_layout(player.red_count, STIMULUS_GRID_SIZE, player.image_seed))
+    player.signal_layout_ok = player.field_maybe_none("signal_layout") == expected
+
+
+# stimulus_mode='on_demand' renders land here, at about 800 px (the 800w variant of tools.stimuli)
+SEEDED_STIMULUS_DIR = Path(__file__).with_name("_static") / "seeded"
+SEEDED_STIMULUS_SCALE = 0.34
+
+
+@lru_cache(maxsize=4096)
+def seeded_stimulus_url(red_count, seed):
+    """
+    URL of the participant's freshly seeded grid, rendered at display size and snapped to the
+    publish palette (a few KB). The file name carries a content hash, so the browser caches it
+    as immutable like the published stimuli; a file already on disk (e.g. before a restart) is reused.
+    """
+    from otree.api import url_of_static_file
+    from dots import PALETTE, encode_png, render_dot_grid
+
+    serve_hashed_stimuli_immutable()
+    pixels = render_dot_grid(n_red=red_count, seed=seed, scale=SEEDED_STIMULUS_SCALE, palette=PALETTE)
+    png = encode_png(pixels, PALETTE)
+    name = f"dots_{red_count}_{seed}.{pixels.shape[1]}w.{hashlib.sha256(png).hexdigest()[:12]}.png"
+    path = SEEDED_STIMULUS_DIR / name
+    if not path.exists():
+        SEEDED_STIMULUS_DIR.mkdir(exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(png)
+        os.replace(tmp, path)
+    return url_of_static_file(f"{SEEDED_STIMULUS_DIR.name}/{name}")
+
+
+# --- stimulus delivery ------------------------------------------------------------------------------------------------
+STIMULUS_MANIFEST = Path(__file__).with_name("_static") / "stimuli" / "manifest.json"
+HASHED_STIMULUS = re.compile(r"\.[0-9a-f]{12}\.(png|webp|avif)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Rendered width of the stimulus; lets the browser pick the variant for its screen and pixel density
+STIMULUS_SIZES = "(max-width: 600px) 100vw, 600px"
+
+
+@lru_cache(maxsize=None)
+def stimulus_manifest():
+    """Logical image name -> served variants, as written by `python -m tools.stimuli --publish-only`."""
+    try:
+        with open(STIMULUS_MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=None)
+def stimulus_picture(image_file):
+    """
+    URLs for global/stimulus_picture.html: a `src` fallback plus one srcset per format, so the
+    browser picks the best format and width it supports. Unpublished images are served as is.
+    """
+    from otree.api import url_of_static_file
+
+    serve_hashed_stimuli_immutable()
+    entry = stimulus_manifest().get(image_file)
+    if entry is None:
+        return MappingProxyType(dict(src=url_of_static_file(image_file), sources=(), sizes=STIMULUS_SIZES))
+    sources = tuple(
+        MappingProxyType(dict(
+            type=source["type"],
+            srcset=", ".join(f"{url_of_static_file(path)} {width}w" for width, path in source["srcset"]),
+        ))
+        for source in entry["sources"]
+    )
+    return MappingProxyType(dict(src=url_of_static_file(entry["src"]), sources=sources, sizes=STIMULUS_SIZES))
+
+
+def preload_stimuli(player, treatment, rounds):
+    """
+    Pictures of the images the participant is scheduled to see in the given rounds, rendered hidden
+    on the page before Signal so the browser fetches the same variant Signal will show.
+    Empty for seeded stimuli, which are rendered on Signal or drawn in the browser.
+    """
+    if player.session.config.get("stimulus_mode", "static") != "static":
+        return []
+    design = get_design()
+    index = player.participant.vars[f"{treatment}_perm"]
+    return [stimulus_picture(scheduled(design, index, r).image_file) for r in rounds]
+
+
+_immutable_caching_enabled = False
 
-    # For each participant, randomize order and assign per-round parameters
-    for p in subsession.get_players():
-        # Shuffle pairs in the first round randomly, different for every player
-        if subsession.round_number == 1:
-            schedule = pairs[:]
-            images = image_files_master[:]
-            # Combine them into tuples and shuffle together
-            combined = list(zip(schedule, images))
-            random.shuffle(combined)
-
-            # Unzip back into two lists
-            schedule, images = zip(*combined)
-            schedule = list(schedule)
-            images = list(images)
-
-            p.participant.vars[f"{treatment}_schedule"] = schedule
-            p.participant.vars[f"{treatment}_images"] = images
-
-        r, y1 = p.participant.vars[f"{treatment}_schedule"][subsession.round_number - 1]
-        image_file = p.participant.vars[f"{treatment}_images"][subsession.round_number - 1]
-
-        p.y1 = y1
-        p.red_count = int(r)
-        p.h_true = p.red_count / 400.0
-        p.pi = 2 if p.red_count > 200 else 0.5
-        p.y2 = 15 if y1 == 5 else 5
-        p.p2 = p.pi * C.P1
-        p.image_file = image_file
-        p.c1_max = calc_c1_max(p)
+
+def serve_hashed_stimuli_immutable():
+    """
+    oTree's static file app only sends ETag/Last-Modified, so every image is revalidated.
+    Content-hashed stimuli never change under the same name; mark them cacheable for a year.
+    Applied on first use, when the server (and its static app) is already loaded.
+    """
+    global _immutable_caching_enabled
+    if _immutable_caching_enabled:
+        return
+    _immutable_caching_enabled = True
+
+    from otree.common2 import static_files_app
+
+    file_response = static_files_app.file_response
+
+    def immutable_file_response(full_path, stat_result, scope, status_code=200):
+        response = file_response(full_path, stat_result, scope, status_code)
+        if HASHED_STIMULUS.search(str(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    static_files_app.file_response = immutable_file_response
 
 
 def build_vars_for_template_choice(player, C):
@@ -56,48 +344,107 @@ def build_vars_for_template_choice(player, C):
             "p1": C.P1,
             "R": C.R,
             "c1_max": player.c1_max,
-            "table_rows": build_payoff_table(
-                player.y1, player.y2, C.P1, C.R, player.c1_max
-            ),
         }
 
 
+def build_js_vars_choice(player, C):
+    """
+    Compact parameters for global/payoff.js, which renders the payoff table and the live c2
+    preview in the browser; the table is no longer part of the HTML.
+    """
+    return dict(
+        payoff=dict(
+            y1=player.y1,
+            y2=player.y2,
+            p1=C.P1,
+            R=C.R,
+            c1_max=player.c1_max,
+            pis=[price.value for price in Price],
+        )
+    )
+
+
 def build_payoff_table(y1, y2, p1, R, c1_max):
     """
     Build a payoff table like Table 1 in the spec:
-    rows for c1 = 1..20, columns for π = 0.5 and 1.5.
-    Returns a list of dicts {c1, u05, u15, infeasible05, infeasible15}.
+    rows for c1 = 1..c1_max, columns for π = 0.5 and π = 2.
+    Returns a tuple of read-only dicts {c1, u05, u15, c2_05, c2_15, infeasible05, infeasible15}.
+
+    Tables only depend on a handful of inputs, so they are computed once and served from
+    _PAYOFF_TABLES afterwards. The pages render the same table in the browser (global/payoff.js).
     """
-    rows = []
-    for k in range(1, floor(c1_max) + 1):
-        c = float(k)
-
-        # π = 0.5
-        pi05 = 0.5
-        p2_05 = pi05 * p1
-        # s05 = y1 - p1 * c
-        # c2_05 = (y2 + R * s05) / p2_05
-        c2_05 = calc_c2(y1, y2, p1, p2_05, c, R)
-        u05 = round(c * c2_05, 2) if c2_05 >= 1 else None
-
-        # π = 2
-        pi2 = 2
-        p2_2 = pi2 * p1
-        # s2 = y1 - p1 * c
-        # c2_2 = (y2 + R * s2) / p2_2
-        c2_2= calc_c2(y1, y2, p1, p2_2, c, R)
-        u2 = round(c * c2_2, 2) if c2_2 >= 1 else None
+    key = (float(y1), float(y2), float(p1), float(R), floor(c1_max))
+    table = _PAYOFF_TABLES.get(key)
+    if table is None:
+        table = _PAYOFF_TABLES[key] = _compute_payoff_table(*key)
+    return table
+
+
+def precompute_payoff_tables(p1, R):
+    """Fill the table cache for every income profile, e.g. from creating_session."""
+    for y1 in get_income_profile():
+        y2 = second_income(y1)
+        build_payoff_table(y1, y2, p1, R, _c1_max(y1, y2))
+
 
+def _compute_payoff_table(y1, y2, p1, R, c1_max):
+    c = np.arange(1, c1_max + 1, dtype=float)
+    p2 = np.array([[Price.LOW.value], [Price.HIGH.value]]) * p1
+
+    # One row per π, one column per c1
+    c2 = calc_c2(y1, y2, p1, p2, c, R)
+    u = np.round(c * c2, 2)
+    infeasible = c2 < 1
+
+    rows = []
+    for k in range(c.size):
         rows.append(
-            dict(
-                c1=k,
-                u05=u05,
-                infeasible05=(c2_05 < 1),
-                u15=u2,
-                infeasible15=(c2_2 < 1),
+            MappingProxyType(
+                dict(
+                    c1=k + 1,
+                    u05=None if infeasible[0, k] else float(u[0, k]),
+                    c2_05=None if infeasible[0, k] else float(c2[0, k]),
+                    infeasible05=bool(infeasible[0, k]),
+                    u15=None if infeasible[1, k] else float(u[1, k]),
+                    c2_15=None if infeasible[1, k] else float(c2[1, k]),
+                    infeasible15=bool(infeasible[1, k]),
+                )
             )
         )
-    return rows
+    return tuple(rows)
+
+
+_PAYOFF_TABLES = {}
+
+PROBE_LIMIT = 500  # logged probes per field; later ones are still answered
+
+
+def live_payoff_preview(player, C, data, field):
+    """
+    live_method of the pages showing the payoff table: global/payoff.js sends {c1, ms} for the c1
+    the participant settles on (debounced), ms since the page was rendered. Answers c2 and u at
+    every π from the cached payoff table, and appends the probe to player.<field> as "c1@ms".
+    """
+    try:
+        c1, ms = float(data["c1"]), int(data["ms"])
+    except (KeyError, TypeError, ValueError):
+        return
+    feasible = 1 <= c1 <= player.c1_max and c1.is_integer()
+    if feasible:
+        row = build_payoff_table(player.y1, player.y2, C.P1, C.R, player.c1_max)[int(c1) - 1]
+        outcomes = [
+            None if row[f"infeasible{suffix}"] else dict(c2=row[f"c2_{suffix}"], u=row[f"u{suffix}"])
+            for suffix in ("05", "15")
+        ]
+    else:
+        outcomes = [None for _ in Price]
+
+    log = player.field_maybe_none(field) or ""
+    if not log:
+        setattr(player, field, f"{c1:g}@{ms}")
+    elif log.count(",") + 1 < PROBE_LIMIT:
+        setattr(player, field, f"{log},{c1:g}@{ms}")
+    return {player.id_in_group: dict(c1=c1, feasible=feasible, outcomes=outcomes)}
 
 
 def synthesize_filenames(red_count, file_names=None):
@@ -119,7 +466,8 @@ def synthesize_filenames(red_count, file_names=None):
 # helper_functions.py
 def record_main_round(player, app_label: str):
     """
-    Push the current round's key data into participant.vars['main_rounds'].
+    Store the current round's key data in participant.vars['main_rounds'], replacing what an
+    earlier submit of the same round recorded.
     Call this at the end of the treatment round (e.g., last page's before_next_page).
     """
     current_round_entry = dict(
@@ -138,31 +486,357 @@ def record_main_round(player, app_label: str):
         pi=getattr(player, "pi", None),
         red_count=getattr(player, "red_count", None),
     )
-    arr = player.participant.vars.setdefault("main_rounds", [])
-    arr.append(current_round_entry)
+    previous = get_main_rounds(player.participant).upsert(current_round_entry)
+    update_monitor(player, current_round_entry, previous)
+
+
+# ---- page timing ----------------------------------------------------------------------------------------------------
+# Server side: {name}_time_offset holds the wall-clock time.time() of the first render of a page
+# (reloads keep it; unlike time.monotonic() it survives a server restart) and {name}_time_spent the
+# seconds until submit. A clock set back in between gives 0 and sets page_timer_skew. Client side:
+# page_timing.js fills the hidden {name}_client_ms (and on Signal pages signal_image_ms /
+# signal_exposure_ms) inputs with performance.now() differences, which exclude network and server latency.
+def start_page_timer(player, name):
+    if player.field_maybe_none(f"{name}_time_offset") is None:
+        setattr(player, f"{name}_time_offset", time.time())
+
+
+def stop_page_timer(player, name):
+    spent = time.time() - getattr(player, f"{name}_time_offset")
+    if spent < 0:
+        player.page_timer_skew = True
+        spent = 0.0
+    setattr(player, f"{name}_time_spent", round(spent, 2))
+
+
+# ---- belief trajectories --------------------------------------------------------------------------------------------
+# global/trajectory.js records the belief slider as (value, ms) samples: the value at render at
+# ms 0, then every change. They are sent as base64 of unsigned LEB128 varints alternating
+# zigzag(Δvalue) and Δms, so a typical path costs one or two bytes per sample.
+TRAJECTORY_MAX_CHARS = 8192  # longer blobs are cut to the last whole sample that fits (trajectory.js stays below)
+
+
+def encode_trajectory(values, ms):
+    """Python twin of trajectory.js, e.g. for tests: integer values and ms offsets to the blob."""
+    deltas = np.column_stack([np.diff(values, prepend=0), np.diff(ms, prepend=0)]).ravel().astype(np.int64)
+    deltas[0::2] = (deltas[0::2] << 1) ^ (deltas[0::2] >> 63)  # zigzag
+    out = bytearray()
+    for n in deltas.tolist():
+        while n >= 0x80:
+            out.append(n & 0x7F | 0x80)
+            n >>= 7
+        out.append(n)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_varints(data):
+    """
+    All unsigned LEB128 varints in the uint8 array data, as int64, without a Python loop: bytes
+    without the continuation bit end a number, and the 7-bit groups of each are OR-ed together.
+    Raises ValueError if the last number is cut off.
+    """
+    if data.size and data[-1] & 0x80:
+        raise ValueError("truncated varint")
+    end = (data & 0x80) == 0
+    starts = np.flatnonzero(np.concatenate([[True], end[:-1]]))
+    position = np.arange(data.size) - np.repeat(starts, np.diff(np.append(starts, data.size)))
+    if position.size and position.max() > 8:
+        raise ValueError("varint too long")
+    groups = (data & 0x7F).astype(np.int64) << (7 * position)
+    return np.bitwise_or.reduceat(groups, starts) if data.size else np.zeros(0, np.int64)
+
+
+def unzigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def decode_trajectory(blob):
+    """(values, ms) int arrays of a trajectory.js blob; ValueError if it is not one."""
+    try:
+        data = np.frombuffer(base64.b64decode(blob, validate=True), np.uint8)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"not base64: {exc}") from None
+    numbers = decode_varints(data)
+    if numbers.size % 2:
+        raise ValueError("odd number of varints")
+    return np.cumsum(unzigzag(numbers[0::2])), np.cumsum(numbers[1::2])
+
+
+def check_trajectory(player, field="belief_trajectory"):
+    """
+    Drop a trajectory the browser sent that does not decode; one over TRAJECTORY_MAX_CHARS is
+    cut to its longest prefix of whole samples that fits, so the start of the path is kept.
+    """
+    blob = player.field_maybe_none(field)
+    if not blob:
+        return
+    try:
+        if len(blob) > TRAJECTORY_MAX_CHARS:
+            blob = truncate_trajectory(blob)
+            setattr(player, field, blob)
+        decode_trajectory(blob)
+    except ValueError:
+        setattr(player, field, None)
+
+
+def truncate_trajectory(blob, max_chars=TRAJECTORY_MAX_CHARS):
+    """The blob cut to the whole (value, ms) samples that fit in max_chars base64 characters."""
+    try:
+        data = np.frombuffer(base64.b64decode(blob[:max_chars // 4 * 4], validate=True), np.uint8)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"not base64: {exc}") from None
+    # Every second varint end closes a sample
+    sample_ends = np.flatnonzero((data & 0x80) == 0)[1::2]
+    keep = sample_ends[-1] + 1 if sample_ends.size else 0
+    return base64.b64encode(data[:keep].tobytes()).decode("ascii")
+
+
+# ---- main round storage ---------------------------------------------------------------------------------------------
+# Column typecodes for participant.vars['main_rounds']. Missing values are stored as NaN ("d")
+# or -1 ("h") and read back as None.
+MAIN_ROUND_COLUMNS = dict(
+    round="h",
+    c1="d",
+    c2="d",
+    u="d",
+    h_true="d",
+    h_hat="d",
+    belief_input_raw="d",
+    y1="d",
+    pi="d",
+    red_count="h",
+)
+
+
+def get_main_rounds(participant):
+    """
+    Accessor for participant.vars['main_rounds'], created on first use. Older layouts (a list of
+    dicts, or columns without the key index) are converted, keeping the last entry per round.
+    """
+    data = participant.vars.get("main_rounds")
+    if not isinstance(data, dict) or "keys" not in data:
+        legacy = list(MainRounds(data)) if isinstance(data, dict) else data or []
+        data = participant.vars["main_rounds"] = MainRounds.empty()
+        rounds = MainRounds(data)
+        for entry in legacy:
+            rounds.upsert(entry)
+    return MainRounds(data)
+
+
+class MainRounds:
+    """
+    Columnar storage for the recorded main rounds: one typed array per field plus a code
+    table for treatment names, which pickles far smaller than a list of dicts.
+    Rows are keyed by (treatment, round), so there is exactly one per round however often
+    it is recorded; version counts the writes.
+    Indexing and iteration yield the same dicts record_main_round records.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @staticmethod
+    def empty():
+        data = {name: array(code) for name, code in MAIN_ROUND_COLUMNS.items()}
+        data["treatments"] = []  # code -> treatment name
+        data["treatment"] = array("B")
+        data["keys"] = {}  # (treatment code, round) -> row
+        data["version"] = 0
+        return data
+
+    def __len__(self):
+        return len(self.data["treatment"])
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError("main round index out of range")
+        entry = dict(treatment=self.data["treatments"][self.data["treatment"][i]])
+        for name, code in MAIN_ROUND_COLUMNS.items():
+            value = self.data[name][i]
+            missing = math.isnan(value) if code == "d" else value == -1
+            entry[name] = None if missing else value
+        return entry
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def version(self):
+        return self.data["version"]
+
+    def upsert(self, entry):
+        """
+        Store entry as the row of its (treatment, round): appended the first time, overwritten in
+        place when the round is recorded again (double submit, back button). Returns the entry
+        it replaced, or None.
+        """
+        treatments = self.data["treatments"]
+        if entry["treatment"] not in treatments:
+            treatments.append(entry["treatment"])
+        code = treatments.index(entry["treatment"])
+        key = (code, int(entry["round"]))
+        row = self.data["keys"].get(key)
+        previous = None if row is None else self[row]
+        if row is None:
+            row = self.data["keys"][key] = len(self)
+            self.data["treatment"].append(code)
+        for name, type_code in MAIN_ROUND_COLUMNS.items():
+            value = entry.get(name)
+            if value is None:
+                value = math.nan if type_code == "d" else -1
+            value = float(value) if type_code == "d" else int(value)
+            if previous is None:
+                self.data[name].append(value)
+            else:
+                self.data[name][row] = value
+        self.data["version"] += 1
+        return previous
+
+    def column(self, name):
+        """A whole field as a NumPy array (treatment names for 'treatment'), for vectorized use."""
+        if name == "treatment":
+            return np.array(self.data["treatments"], dtype=object)[np.frombuffer(self.data["treatment"], np.uint8)]
+        return np.array(self.data[name])
+
+
+# ---- live monitor ---------------------------------------------------------------------------------------------------
+# session.vars['monitor'] holds running counts that record_main_round updates, so the admin report
+# renders from a fixed number of counters instead of scanning every player on each refresh.
+MONITOR_PAGES = ("signal", "choice", "belief", "belief_choice")
+PAGE_TIME_EDGES = (0, 2, 5, 10, 20, 30, 60, 120)  # seconds; the last bin is open-ended
+BELIEF_ERROR_BINS = 10  # over h_hat minus the binary truth (red majority) in [-1, 1]
+ASSIGNED_C1_TREATMENTS = ("t4",)  # c1 is set by role there, not chosen
+
+
+def get_monitor(session):
+    monitor = session.vars.get("monitor")
+    if monitor is None:
+        monitor = session.vars["monitor"] = dict(
+            rounds={},  # treatment -> recorded rounds
+            finished={},  # treatment -> participants past the last round
+            belief={},  # treatment -> [n, sum, sum of squares] of the belief error, see belief_error
+            belief_hist={},  # treatment -> counts per BELIEF_ERROR_BINS bin
+            c1_hist={},  # "y1, π" -> {c1: count}
+            page_hist={},  # "treatment page" -> counts per PAGE_TIME_EDGES bin
+        )
+    return monitor
+
+
+def update_monitor(player, entry, previous=None):
+    """
+    Add one recorded round to the session's running counts. A round recorded again (previous is
+    the entry it replaced) swaps its belief and c1 counts and is not counted a second time.
+    """
+    monitor = get_monitor(player.session)
+    treatment = entry["treatment"]
+    if previous is not None:
+        _count_decision(monitor, previous, -1)
+        _count_decision(monitor, entry, 1)
+        return
+
+    monitor["rounds"][treatment] = monitor["rounds"].get(treatment, 0) + 1
+    if entry["round"] == get_round_count():
+        monitor["finished"][treatment] = monitor["finished"].get(treatment, 0) + 1
+    _count_decision(monitor, entry, 1)
+    for page in MONITOR_PAGES:
+        seconds = _maybe_field(player, f"{page}_time_spent")
+        if seconds is None:
+            continue
+        hist = monitor["page_hist"].setdefault(f"{treatment} {page}", [0] * len(PAGE_TIME_EDGES))
+        hist[max(bisect_right(PAGE_TIME_EDGES, seconds) - 1, 0)] += 1
+
+
+def _count_decision(monitor, entry, sign):
+    treatment = entry["treatment"]
+    if entry["h_hat"] is not None and entry["h_true"] is not None:
+        error = float(belief_error(entry["h_hat"], entry["h_true"]))
+        stats = monitor["belief"].setdefault(treatment, [0, 0.0, 0.0])
+        stats[0] += sign
+        stats[1] += sign * error
+        stats[2] += sign * error * error
+        hist = monitor["belief_hist"].setdefault(treatment, [0] * BELIEF_ERROR_BINS)
+        hist[min(max(int((error + 1) / 2 * BELIEF_ERROR_BINS), 0), BELIEF_ERROR_BINS - 1)] += sign
+
+    if entry["c1"] is not None and treatment not in ASSIGNED_C1_TREATMENTS:
+        hist = monitor["c1_hist"].setdefault(f"y1 = {entry['y1']:g}, π = {entry['pi']:g}", {})
+        c1 = int(round(entry["c1"]))
+        hist[c1] = hist.get(c1, 0) + sign
+
+
+def _maybe_field(player, name):
+    try:
+        return player.field_maybe_none(name)
+    except AttributeError:  # this app has no such page
+        return None
+
+
+def monitor_report(session):
+    """vars_for_admin_report of the live monitor (intro/admin_report.html), from the running counts only."""
+    monitor = get_monitor(session)
+    n = session.num_participants
+
+    def bars(counts, labels):
+        top = max(counts, default=0) or 1
+        return [dict(label=l, count=c, pct=round(100 * c / top)) for l, c in zip(labels, counts)]
+
+    completion = [
+        dict(treatment=t, rounds=monitor["rounds"][t], finished=monitor["finished"].get(t, 0), participants=n)
+        for t in monitor["rounds"]
+    ]
+    width = 2 / BELIEF_ERROR_BINS
+    error_labels = [f"{-1 + i * width:+.1f} … {-1 + (i + 1) * width:+.1f}" for i in range(BELIEF_ERROR_BINS)]
+    beliefs = []
+    for t, (count, total, squares) in monitor["belief"].items():
+        mean = total / count if count else 0.0
+        sd = math.sqrt(max(squares / count - mean * mean, 0.0)) if count else 0.0
+        beliefs.append(dict(treatment=t, n=count, mean=round(mean, 3), sd=round(sd, 3),
+                            bars=bars(monitor["belief_hist"][t], error_labels)))
+    c1 = [
+        dict(key=key, bars=bars([hist[c] for c in sorted(hist)], sorted(hist)))
+        for key, hist in sorted(monitor["c1_hist"].items())
+    ]
+    time_labels = [f"{a}–{b} s" for a, b in zip(PAGE_TIME_EDGES, PAGE_TIME_EDGES[1:])] + [f"≥ {PAGE_TIME_EDGES[-1]} s"]
+    pages = [dict(key=key, bars=bars(hist, time_labels)) for key, hist in sorted(monitor["page_hist"].items())]
+    return dict(completion=completion, beliefs=beliefs, c1=c1, pages=pages)
 
 
 # ---- Calculation helpers --------------------------------------------------------------------------------------------
-def run_binary_lottery(chosen, prize: float = 100):
+def run_binary_lottery(h_hat, h_true, U_draw, prize):
     """
-    Binary scoring lottery.
-    Returns the prize if the player wins, else 0.
+    Binary scoring lottery, elementwise for arrays (payoff.finalize_payments,
+    tools.payout_budget): the prize is won when the uniform draw U_draw is at most the
+    threshold. Returns (points, won, threshold).
     """
-    h_hat = float(chosen.get("h_hat") or 0.0)
-    h_true = 1 if float(chosen.get("h_true") or 0.0) > 0.5 else 0
+    threshold = binary_lottery_threshold(h_hat, h_true)
+    won = np.asarray(U_draw) <= threshold
+    return np.where(won, float(prize), 0.0), won, threshold
 
-    threshold = max(0.0, 1.0 - abs(h_hat - h_true))
-    u = random.random()
 
-    if u <= threshold:
-        return prize, threshold
-    else:
-        return 0, threshold
+def binary_lottery_threshold(h_hat, h_true):
+    """Winning probability of the binary lottery; elementwise for arrays (see payoff.finalize_payments)."""
+    return np.maximum(0.0, 1.0 - np.abs(belief_error(h_hat, h_true)))
+
+
+def belief_error(h_hat, h_true):
+    """
+    h_hat (the stated probability that red is the majority) minus the binary truth, 1 when
+    h_true = red_count / 400 is above 0.5 and 0 otherwise; elementwise for arrays.
+    """
+    return np.asarray(h_hat) - np.where(np.asarray(h_true) > 0.5, 1.0, 0.0)
 
 
 # ---- helpers per spec ----
 def calc_c1_max(p) -> float:
-    return floor(p.y1 + p.y2 / 2) # TODO: Price HIGH
+    return _c1_max(p.y1, p.y2)
+
+
+def _c1_max(y1, y2) -> float:
+    return floor(y1 + y2 / 2) # TODO: Price HIGH
+
+
+def second_income(y1):
+    """Period-2 income of an income profile: the other of get_income_profile()."""
+    return 15 if y1 == 5 else 5
 
 
 def c2_given(p, C) -> float:
@@ -2,6 +2,7 @@
 from otree.api import *
 from pathlib import Path
 from .question_reader import load_questions
+from helper_functions import monitor_report
 
 doc = """Your app description"""
 
@@ -83,6 +84,11 @@ class ComprehensionTest(Page):
         return errors or None
 
 
+def vars_for_admin_report(subsession):
+    # Live monitor of the whole session; the intro app's report is the one the Reports tab opens
+    return monitor_report(subsession.session)
+
+
 class SyncGate(WaitPage):
     @staticmethod
     def is_displayed(player):
@@ -1,12 +1,19 @@
 # question_loader.py
+import hashlib
+import json
+import os
 from pathlib import Path
-import openpyxl
+
+# Erhöhen, wenn sich das Format der Cache-Datei ändert
+CACHE_VERSION = 1
+
 
 class QuestionSpec(dict):
     """Einfacher Container: {'label': str, 'choices': [[1,'A'],...], 'correct': int}"""
     pass
 
-def load_questions(xlsx_path: str | Path, sheet: str | None = None) -> list[QuestionSpec]:
+def load_questions(xlsx_path: str | Path, sheet: str | None = None,
+                   cache_path: str | Path | None = None) -> list[QuestionSpec]:
     """
     Erwartetes Excel-Layout (ab Zeile 2):
       A: Frage-Text (Label)
@@ -15,8 +22,43 @@ def load_questions(xlsx_path: str | Path, sheet: str | None = None) -> list[Ques
       D: Antwort 2
       E: Antwort 3
       F: Antwort 4
+
+    Die kompilierten Fragen werden neben der Arbeitsmappe als <name>.cache.json
+    abgelegt (Schlüssel: mtime, Größe und SHA-256 der Datei). openpyxl wird nur
+    geladen, wenn sich die Arbeitsmappe geändert hat.
     """
     xlsx_path = Path(xlsx_path)
+    cache_path = Path(cache_path) if cache_path else xlsx_path.with_suffix('.cache.json')
+    stat = xlsx_path.stat()
+
+    cached = _read_cache(cache_path)
+    if cached is not None and cached['sheet'] == sheet:
+        # Schneller Pfad: Datei unverändert seit dem letzten Kompilieren
+        if cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            return [QuestionSpec(q) for q in cached['questions']]
+        # mtime geändert (z. B. nach git clone), Inhalt aber gleich. Der Cache wird
+        # dabei nicht neu geschrieben, damit die eingecheckte Datei unverändert bleibt.
+        digest = _sha256(xlsx_path)
+        if cached['sha256'] == digest:
+            return [QuestionSpec(q) for q in cached['questions']]
+    else:
+        digest = _sha256(xlsx_path)
+
+    out = _read_workbook(xlsx_path, sheet)
+    _write_cache(cache_path, dict(
+        version=CACHE_VERSION,
+        sheet=sheet,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        sha256=digest,
+        questions=out,
+    ))
+    return out
+
+
+def _read_workbook(xlsx_path: Path, sheet: str | None) -> list[QuestionSpec]:
+    import openpyxl
+
     wb = openpyxl.load_workbook(xlsx_path, data_only=True, read_only=True)
     ws = wb[sheet] if sheet else wb.active
 
@@ -39,3 +81,27 @@ def load_questions(xlsx_path: str | Path, sheet: str | None = None) -> list[Ques
     if not out:
         raise ValueError("Keine Fragen gefunden.")
     return out
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _read_cache(cache_path: Path) -> dict | None:
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached if cached.get('version') == CACHE_VERSION else None
+
+
+def _write_cache(cache_path: Path, data: dict) -> None:
+    # Best effort: ein schreibgeschütztes Dateisystem darf den Start nicht verhindern
+    tmp = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
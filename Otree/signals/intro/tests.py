@@ -0,0 +1,13 @@
+from otree.api import Bot, SubmissionMustFail
+from . import *
+
+
+class PlayerBot(Bot):
+    def play_round(self):
+        answers = {f'q{i + 1}': C.QUESTIONS[i]['correct'] for i in range(5)}
+        wrong = {field: right % 4 + 1 for field, right in answers.items()}
+
+        yield WelcomePage
+        yield GeneralInstructions
+        yield SubmissionMustFail(ComprehensionTest, wrong)
+        yield ComprehensionTest, answers
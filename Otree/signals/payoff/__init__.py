@@ -1,5 +1,7 @@
+from collections import defaultdict
+
+import numpy as np
 from otree.api import *
-import random
 from helper_functions import *
 
 doc = """
@@ -51,57 +53,240 @@ def belief_enabled(session):
     return session.config.get('belief_pay_enabled', True)
 
 
-def set_final_payoff(player: Player):
-    rounds = player.participant.vars.get('main_rounds', [])
+# t0_baseline, t1, t3 and t4 record get_round_count() main rounds each
+MAIN_ROUNDS_PER_PARTICIPANT = 4 * get_round_count()
+# Uniforms per participant from the payoff stream: paid round, payoff type, belief lottery
+PAYOFF_DRAWS = 3
+
+
+def finalize_payments(players, complete_only=True):
+    """
+    Compute the payment of every participant in players that has none yet, in one vectorized
+    pass over their main rounds: the paid round, the payoff type, the belief lottery and the
+    euro amount. With complete_only, participants who have not finished all main rounds are
+    left open. Called from the participant flow (Final) and the payment export only; the admin
+    report just reads the stored results. Returns the players finalized by this call.
+    """
+    by_session = defaultdict(list)
+    for p in players:
+        if p.participant.vars.get('final_payoff_set'):
+            continue
+        if complete_only and len(get_main_rounds(p.participant)) < MAIN_ROUNDS_PER_PARTICIPANT:
+            continue
+        by_session[p.session.code].append(p)
+
+    finalized = []
+    for pending in by_session.values():
+        _finalize_session(pending)
+        finalized.extend(pending)
+    return finalized
+
+
+def _finalize_session(players):
+    session = players[0].session
+    showup_fee = float(session.config.get('showup_fee'))
+    conversion_rate = float(session.config.get('conversion_rate'))
+    prize = float(session.config.get('binary_lotterie_prize'))
+    # Each participant's three draws come from their own "payoff" stream, so a payment does not
+    # depend on who else is finalized in the same batch and can be replayed (tools.replay)
+    draws = player_uniforms(players, 'payoff', PAYOFF_DRAWS)
+
+    # All main rounds of all participants as flat columns; participant k owns rows
+    # offsets[k] : offsets[k] + lengths[k]
+    rounds = [get_main_rounds(p.participant) for p in players]
+    lengths = np.array([len(r) for r in rounds])
+    offsets = np.cumsum(lengths) - lengths
+    has_rounds = lengths > 0
+
+    # 1) Uniform draw over each participant's main rounds
+    paid_index = np.floor(draws[:, 0] * lengths).astype(int)
+    rows = (offsets + paid_index)[has_rounds]
+
+    def chosen(name, missing=0.0):
+        values = np.full(len(players), missing, dtype=object if name == 'treatment' else float)
+        if rows.size:
+            values[has_rounds] = np.concatenate([r.column(name) for r in rounds])[rows]
+        return values
+
+    u_points = np.nan_to_num(chosen('u'))
+    h_hat = np.nan_to_num(chosen('h_hat'))
+    h_true = np.nan_to_num(chosen('h_true'))
+
+    # 2) Payoff type: consumption or belief, 50/50 (belief only if enabled)
+    belief = (draws[:, 1] < 0.5) & has_rounds & belief_enabled(session)
+
+    # 3) Binary scoring lottery: win the prize with probability 1 - |h_hat - h_true|
+    U_draw = draws[:, 2]
+    belief_points, won, threshold = run_binary_lottery(h_hat, h_true, U_draw, prize)
+    payoff = showup_fee + np.where(belief, belief_points, u_points) * conversion_rate
+
+    treatment = chosen('treatment', 'n/a')
+    paid_round = chosen('round')
+    red_count = chosen('red_count')
+    belief_raw = chosen('belief_input_raw')
+    for k, player in enumerate(players):
+        player.paid_index = int(paid_index[k]) if has_rounds[k] else 0
+        player.paid_treatment = treatment[k]
+        player.paid_round = int(paid_round[k])
+        player.showup_fee = showup_fee
+        player.conversion_rate = conversion_rate
+        if belief[k]:
+            player.payoff_type = 'belief'
+            player.U_draw = float(U_draw[k])
+            player.threshold = round(float(threshold[k]), 2)
+            player.won_belief = bool(won[k])
+            player.belief_points = float(belief_points[k])
+            player.true_red_count = int(red_count[k])
+            player.belief_raw = float(belief_raw[k])
+        else:
+            player.payoff_type = 'consumption'
+            player.u_points = float(u_points[k])
+        player.payoff = float(payoff[k])
+        player.final_payoff = player.payoff
+        player.participant.vars['final_payoff_set'] = True
+        # main_rounds version the payment was drawn from; a later write shows up as a newer version
+        player.participant.vars['final_payoff_version'] = rounds[k].version
+
+
+def vars_for_admin_report(subsession: Subsession):
+    # Read-only: payments are set on Final or by the payment export, never by viewing the report
+    players = subsession.get_players()
+    finalized = [p.participant.vars.get('final_payoff_set', False) for p in players]
+    payments = [
+        dict(code=p.participant.code, label=p.participant.label or '', total=p.payoff if done else '—')
+        for p, done in zip(players, finalized)
+    ]
+    return dict(payments=payments, num_finalized=sum(finalized), num_open=len(players) - sum(finalized))
+
+
+def custom_export_payments(players):
+    """
+    Payment file for the cashier (Data page, "custom_export_payments"; oTree 6 lists every
+    custom_export_* function there, hence the pin in requirements.txt). Payments still open are
+    finalized first; participants who have not finished the main rounds get an empty total.
+    """
+    finalize_payments(players)
+    yield ['session_code', 'participant_code', 'participant_label', 'showup_fee', 'total']
+    for p in players:
+        total = round(float(p.payoff), 2) if p.participant.vars.get('final_payoff_set') else ''
+        yield [p.session.code, p.participant.code, p.participant.label, p.session.config.get('showup_fee'), total]
+
+
+# ---- round export ----------------------------------------------------------------------------------------------------
+TREATMENT_APPS = ('t0_baseline', 't1', 't3', 't4')
+# Player fields of the treatment apps, in export order; an app without a field leaves it empty
+ROUND_FIELDS = [
+    'current_role', 'red_count', 'y1', 'y2', 'pi', 'p2', 'c1_max', 'c1', 'c2', 'u', 'income_probes', 'c1_probes',
+    'h_true', 'h_hat', 'belief_input_raw', 'belief_trajectory',
+    'choice_time_spent', 'choice_client_ms', 'belief_time_spent', 'belief_client_ms',
+    'belief_choice_time_spent', 'belief_choice_client_ms',
+    'signal_time_spent', 'signal_client_ms', 'signal_image_ms', 'signal_exposure_ms', 'page_timer_skew',
+]
+PARTICIPANT_COLUMNS = ['session_code', 'participant_code', 'participant_label']
+PAYOFF_COLUMNS = ['payoff_type', 'paid_treatment', 'paid_round', 'total']
+EXPORT_CHUNK = 200  # participants per treatment-app query
+
+
+def _query_rounds(app_name, participant_ids):
+    """(participant_id, round_number, {field: value}) rows of one treatment app, as plain tuples."""
+    from importlib import import_module
+    from otree.database import dbq
+
+    Player = import_module(app_name).Player
+    fields = [f for f in ROUND_FIELDS if f in Player.__table__.columns]
+    query = (
+        dbq(Player.participant_id, Player.round_number, *(getattr(Player, f) for f in fields))
+        .filter(Player.participant_id.in_(participant_ids))
+        .order_by(Player.participant_id, Player.round_number)
+    )
+    for participant_id, round_number, *values in query:
+        yield participant_id, round_number, dict(zip(fields, values))
+
+
+def iter_participant_rounds(players, chunk=EXPORT_CHUNK):
+    """
+    (payoff player, {treatment: {round: fields}}) per participant. The treatment apps are
+    queried for chunk participants at a time, selecting ROUND_FIELDS columns only instead of
+    loading their Player objects. That bounds this function's own working set to one chunk of
+    rounds; the export as a whole still holds every payoff player (oTree builds the players list)
+    and every yielded row (oTree buffers the response before sending it).
+    """
+    for start in range(0, len(players), chunk):
+        batch = players[start:start + chunk]
+        rounds = defaultdict(lambda: defaultdict(dict))
+        ids = [p.participant.id for p in batch]
+        for app_name in TREATMENT_APPS:
+            for participant_id, round_number, fields in _query_rounds(app_name, ids):
+                rounds[participant_id][app_name][round_number] = fields
+        for p in batch:
+            yield p, rounds.get(p.participant.id, {})
+
+
+def _participant_cells(p):
+    return [p.session.code, p.participant.code, p.participant.label or '']
+
+
+def _payoff_cells(p):
+    if not p.participant.vars.get('final_payoff_set'):
+        return ['', '', '', '']
+    return [p.payoff_type, p.paid_treatment, p.paid_round, round(float(p.payoff), 2)]
 
-    # Safety: ignore if somehow empty
-    if not rounds:
-        player.payoff_type = 'consumption'
-        player.paid_index = 0
-        player.paid_treatment = 'n/a'
-        player.paid_round = 0
-        player.u_points = 0
-        player.final_payoff = player.session.config.get('showup_fee')
-        return
 
-    # 1) Uniform draw over the 100 main rounds
-    player.paid_index = random.randrange(len(rounds))
-    chosen = rounds[player.paid_index]
+def _blank(value):
+    return '' if value is None else value
 
-    # From which treatment is the payoff chosen?
-    player.paid_treatment = chosen.get('treatment')
-    player.paid_round = int(chosen.get('round', 0))
 
-    # 2) Randomly choose payoff type
-    player.payoff_type = random.choice(['consumption', 'belief'])
+def custom_export_rounds(players):
+    """
+    All treatment rounds in long format (Data page, "custom_export_rounds"): one row per
+    participant, treatment and round with decisions, timing and the payoff selection; `paid`
+    marks the round drawn for payment. Payments are not finalized here. Column names match
+    tools.analysis.read_rows. Listed on the Data page by oTree 6 (see requirements.txt); the
+    file is built in memory, see iter_participant_rounds.
+    """
+    yield PARTICIPANT_COLUMNS + ['treatment', 'round'] + ROUND_FIELDS + ['paid'] + PAYOFF_COLUMNS
+    for p, rounds in iter_participant_rounds(players):
+        participant = _participant_cells(p)
+        payoff = _payoff_cells(p)
+        for app_name, by_round in rounds.items():
+            for round_number, fields in by_round.items():
+                paid = int(payoff[1] == app_name and payoff[2] == round_number)
+                yield (
+                    participant + [app_name, round_number]
+                    + [_blank(fields.get(f)) for f in ROUND_FIELDS]
+                    + [paid] + payoff
+                )
 
-    # 3) Compute payoff
-    player.showup_fee = float(player.session.config.get('showup_fee'))
-    player.conversion_rate = float(player.session.config.get('conversion_rate'))
-    belief_prize = float(player.session.config.get('binary_lotterie_prize'))
 
-    if player.payoff_type == 'consumption' or not belief_enabled(player.session):
-        player.u_points = float(chosen.get('u') or 0.0)
-        player.payoff = player.u_points * player.conversion_rate
-    else:
-        # Binary scoring lottery: Pr(win 100) = 1 - (h_hat - h_true)^2
-        player.belief_points, player.threshold = run_binary_lottery(
-            chosen, belief_prize
-        )
-        player.threshold = round(player.threshold, 2)
-        player.payoff = player.belief_points * player.conversion_rate
-        player.true_red_count = chosen.get('red_count')
-        player.belief_raw = chosen.get('belief_input_raw')
+def custom_export_rounds_wide(players):
+    """
+    The same data in wide format: one row per participant, with a
+    {treatment}.{round}.{field} column for every treatment round. Discovery and memory as for
+    custom_export_rounds.
+    """
+    from importlib import import_module
 
-    player.payoff += player.showup_fee
+    layout = [
+        (app_name, round_number)
+        for app_name in TREATMENT_APPS
+        for round_number in range(1, import_module(app_name).C.NUM_ROUNDS + 1)
+    ]
+    yield PARTICIPANT_COLUMNS + PAYOFF_COLUMNS + [
+        f'{app_name}.{round_number}.{f}' for app_name, round_number in layout for f in ROUND_FIELDS
+    ]
+    for p, rounds in iter_participant_rounds(players):
+        row = _participant_cells(p) + _payoff_cells(p)
+        for app_name, round_number in layout:
+            fields = rounds.get(app_name, {}).get(round_number, {})
+            row.extend(_blank(fields.get(f)) for f in ROUND_FIELDS)
+        yield row
 
 
 class Final(Page):
     @staticmethod
     def vars_for_template(player: Player):
-        if not player.participant.vars.get('final_payoff_set'):
-            set_final_payoff(player)
-            player.participant.vars['final_payoff_set'] = True
+        # Reaching Final settles the participant's payment; later renders only display it
+        finalize_payments([player], complete_only=False)
         return dict(belief_enabled=belief_enabled(player.session))
 
 
@@ -0,0 +1,50 @@
+import tempfile
+
+from otree.api import Bot, expect
+from otree.export import export_app
+from tools.analysis import read_rows
+from . import *
+
+
+class PlayerBot(Bot):
+    def play_round(self):
+        # Final has no next button; the payoff is set when the page is rendered
+        expect(self.participant.vars['final_payoff_set'], True)
+        expect(len(get_main_rounds(self.participant)), 4 * get_round_count())
+        expect(self.player.payoff, '>=', self.session.config['showup_fee'])
+        expect(self.player.payoff_type, 'in', ['consumption', 'belief'])
+        expect(self.participant.vars['final_payoff_version'], get_main_rounds(self.participant).version)
+
+        # The draws replay from the master seed alone
+        master_seed = self.session.vars['master_seed']
+        draws = stream_uniforms(master_seed, 'payoff', [self.participant.id_in_session], PAYOFF_DRAWS)[0]
+        expect(self.player.paid_index, int(draws[0] * MAIN_ROUNDS_PER_PARTICIPANT))
+
+        # Already finalized: the payment file must not redraw it, and the admin report only reads
+        expect(finalize_payments([self.player]), [])
+        report = vars_for_admin_report(self.subsession)
+        expect(report['num_finalized'] + report['num_open'], len(self.subsession.get_players()))
+        expect([row['total'] for row in report['payments'] if row['code'] == self.participant.code],
+               [self.player.payoff])
+        header, row = custom_export_payments([self.player])
+        expect(header[-1], 'total')
+        expect(row[1], self.participant.code)
+        expect(row[-1], round(float(self.player.payoff), 2))
+
+        # One long row per main round, the paid one marked; one wide row per participant
+        header, *rows = custom_export_rounds([self.player])
+        expect(len(rows), 4 * get_round_count())
+        expect(sum(row[header.index('paid')] for row in rows), 1)
+        expect(rows[0][header.index('participant_code')], self.participant.code)
+        header, row = custom_export_rounds_wide([self.player])
+        expect(len(row), len(header))
+
+        # oTree's own per-app export reads back with participant and session columns kept apart
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', encoding='utf-8') as f:
+            export_app('t1', f, session_code=self.session.code)
+            f.flush()
+            columns = read_rows(f.name, 't1')
+        expect(self.participant.code, 'in', columns['participant_code'])
+        expect(set(columns['session_code']), {self.session.code})
+        expect(self.session.code, 'not in', columns['participant_code'])
+        expect(set(columns['round'].tolist()), set(range(1, get_round_count() + 1)))
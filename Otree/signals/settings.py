@@ -17,6 +17,12 @@ SESSION_CONFIGS = [
         showup_fee=4.0,
         conversion_rate=0.1,
         binary_lotterie_prize=100,
+        # 'static': shared images from _static, 'on_demand': fresh layout per participant,
+        # 'canvas': fresh layout per participant, drawn in the browser from its seed
+        stimulus_mode='static',
+        # Seed of every random draw in the session (schedules, roles, stimuli, payment); None draws
+        # a fresh one. The seed in use is kept in session.vars['master_seed'] (see tools.replay).
+        master_seed=None,
     ),
 ]
 
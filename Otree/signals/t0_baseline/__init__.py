@@ -1,5 +1,4 @@
 from otree.api import *
-import time
 from helper_functions import *
 
 class C(BaseConstants):
@@ -31,25 +30,39 @@ class Player(BasePlayer):
     pi = models.FloatField()  # inflation factor: 1.5 if r > 200 else 0.5
     p2 = models.FloatField()  # period-2 price (= pi * p1 by default)
     image_file = models.StringField()
+    image_seed = models.IntegerField()  # only set with stimulus_mode='on_demand' or 'canvas'
 
     # Decision
     c1_max = models.FloatField()
     c1 = models.FloatField()
+    c1_probes = models.LongStringField(blank=True)  # previewed c1 as c1@ms (live_payoff_preview)
 
     # Belief entry (raw and normalized)
     belief_input_raw = models.FloatField()  # 0–400 (B1)
+    belief_trajectory = models.LongStringField(blank=True)  # belief slider path (global/trajectory.js)
     h_hat = models.FloatField()  # normalized to [0, 1]
 
     # Implied outcomes
     c2 = models.FloatField()
     u = models.FloatField()
 
-    # Time tracking
+    # Time tracking (see start_page_timer)
+    page_timer_skew = models.BooleanField(initial=False)  # a server timer ran backwards, clamped to 0
     choice_time_offset = models.FloatField()
     choice_time_spent = models.FloatField()
+    choice_client_ms = models.IntegerField(blank=True)
 
     belief_time_offset = models.FloatField()
     belief_time_spent = models.FloatField()
+    belief_client_ms = models.IntegerField(blank=True)
+
+    signal_time_offset = models.FloatField()
+    signal_time_spent = models.FloatField()
+    signal_client_ms = models.IntegerField(blank=True)
+    signal_image_ms = models.IntegerField(blank=True)  # render -> image visible
+    signal_exposure_ms = models.IntegerField(blank=True)  # image visible -> submit
+    signal_layout = models.StringField(blank=True)  # canvas mode: layout drawn by the browser
+    signal_layout_ok = models.BooleanField()  # canvas mode: signal_layout matches dots.dot_layout
 
 
 # -- oTree lifecycle hooks (function-based API) --
@@ -72,6 +85,11 @@ class Explanation(Page):
     def is_displayed(player: Player):
         return player.round_number == 1
 
+    @staticmethod
+    def vars_for_template(player: Player):
+        # Fetch every scheduled image while the participant reads the instructions
+        return dict(preload_images=preload_stimuli(player, "t0", range(1, C.NUM_ROUNDS + 1)))
+
 # Just for player coordination to not progress too fast
 class SyncGate(WaitPage):
     @staticmethod
@@ -80,12 +98,23 @@ class SyncGate(WaitPage):
 
 class Choice(Page):
     form_model = "player"
-    form_fields = ["c1"]
+    form_fields = ["c1", "choice_client_ms"]
 
     @staticmethod
     def vars_for_template(player: Player):
-        player.choice_time_offset = time.time()
-        return build_vars_for_template_choice(player, C)
+        start_page_timer(player, "choice")
+        return dict(
+            build_vars_for_template_choice(player, C),
+            preload_images=preload_stimuli(player, "t0", [player.round_number]),
+        )
+
+    @staticmethod
+    def js_vars(player: Player):
+        return build_js_vars_choice(player, C)
+
+    @staticmethod
+    def live_method(player: Player, data):
+        return live_payoff_preview(player, C, data, 'c1_probes')
 
     @staticmethod
     def error_message(player: Player, values):
@@ -95,29 +124,34 @@ class Choice(Page):
         if not (1 <= c1 <= player.c1_max):
             return f"c1 must be between 1 and {player.c1_max:.2f}."
 
-    # Calculate time spent on page. NOTE: Reloading will reset offset timer
     @staticmethod
     def before_next_page(player: Player, timeout_happened):
-        player.choice_time_spent = round(time.time() - player.choice_time_offset, 2)
+        stop_page_timer(player, "choice")
 
 
 class Signal(Page):
+    form_model = "player"
+    form_fields = ["signal_client_ms", "signal_image_ms", "signal_exposure_ms", "signal_layout"]
+
     @staticmethod
     def vars_for_template(player: Player):
-        return dict(
-            image_file=player.image_file,
-            show_seconds=C.SIGNAL_SHOW_SECONDS,
-        )
+        start_page_timer(player, "signal")
+        return build_vars_for_template_signal(player, C)
+
+    @staticmethod
+    def before_next_page(player: Player, timeout_happened):
+        stop_page_timer(player, "signal")
+        verify_canvas_layout(player)
 
 
 class Belief(Page):
     form_model = "player"
-    form_fields = ["belief_input_raw"]
+    form_fields = ["belief_input_raw", "belief_client_ms", "belief_trajectory"]
 
-    # Only hook to call time()
+    # Only hook to start the timer
     @staticmethod
     def vars_for_template(player: Player):
-        player.belief_time_offset = time.time()
+        start_page_timer(player, "belief")
         return {}
 
     @staticmethod
@@ -130,7 +164,8 @@ class Belief(Page):
 
     @staticmethod
     def before_next_page(player: Player, timeout_happened):
-        player.belief_time_spent = round(time.time() - player.belief_time_offset, 2)
+        stop_page_timer(player, "belief")
+        check_trajectory(player)
 
         # Normalize belief for storing
         player.h_hat = float(player.belief_input_raw) / 100.0
@@ -0,0 +1,33 @@
+from otree.api import Bot, SubmissionMustFail, expect
+from dots import dot_layout, layout_hex
+from . import *
+
+
+class PlayerBot(Bot):
+    def play_round(self):
+        if self.round_number == 1:
+            yield Explanation
+        yield SubmissionMustFail(Choice, dict(c1=0))
+        yield SubmissionMustFail(Choice, dict(c1=self.player.c1_max + 1))
+        yield Choice, dict(c1=3)
+        signal = dict(signal_client_ms=6100, signal_image_ms=40, signal_exposure_ms=6060)
+        canvas = self.session.config.get('stimulus_mode') == 'canvas'
+        if canvas:
+            # what dot_grid.js sends back after drawing
+            layout = dot_layout(self.player.red_count, STIMULUS_GRID_SIZE, self.player.image_seed)
+            signal['signal_layout'] = layout_hex(layout)
+        yield Signal, signal
+        yield SubmissionMustFail(Belief, dict(belief_input_raw=-1))
+        yield SubmissionMustFail(Belief, dict(belief_input_raw=401))
+        # what trajectory.js sends: the slider from 50 at render to the submitted 40
+        trajectory = encode_trajectory([50, 62, 35, 40], [0, 900, 1650, 2400])
+        yield Belief, dict(belief_input_raw=40, belief_trajectory=trajectory)
+        expect(self.player.h_hat, 0.4)
+        values, ms = decode_trajectory(self.player.belief_trajectory)
+        expect(values.tolist(), [50, 62, 35, 40])
+        expect(ms.tolist(), [0, 900, 1650, 2400])
+        expect(self.player.u, 3 * self.player.c2)
+        expect(self.player.signal_exposure_ms, 6060)
+        if canvas:
+            expect(self.player.signal_layout_ok, True)
+        expect(self.player.choice_time_spent, '>=', 0)
@@ -0,0 +1,24 @@
+import time
+
+from otree.api import Bot, SubmissionMustFail, expect
+from . import *
+
+
+class PlayerBot(Bot):
+    def play_round(self):
+        if self.round_number == 1:
+            yield Explanation
+        # The server clock set back a minute while Signal is open: no negative duration is stored
+        self.player.signal_time_offset = time.time() + 60
+        yield Signal
+        expect(self.player.signal_time_spent, 0)
+        expect(self.player.page_timer_skew, True)
+        yield SubmissionMustFail(Belief, dict(belief_input_raw=-1))
+        yield SubmissionMustFail(Belief, dict(belief_input_raw=401))
+        yield Belief, dict(belief_input_raw=60, belief_trajectory='not a trajectory')
+        expect(self.player.field_maybe_none('belief_trajectory'), None)
+        yield SubmissionMustFail(Choice, dict(c1=0))
+        yield SubmissionMustFail(Choice, dict(c1=self.player.c1_max + 1))
+        yield Choice, dict(c1=4)
+        expect(self.player.h_hat, 0.6)
+        expect(self.player.u, 4 * self.player.c2)
@@ -1,6 +1,5 @@
 from otree.api import *
 from helper_functions import *
-import time
 class C(BaseConstants):
     NAME_IN_URL = 't3'
     PLAYERS_PER_GROUP = None
@@ -31,22 +30,37 @@ class Player(BasePlayer):
     pi = models.FloatField()  # inflation factor: 1.5 if r > 200 else 0.5
     p2 = models.FloatField()  # period-2 price (= pi * p1 by default)
     image_file = models.StringField()
+    image_seed = models.IntegerField()  # only set with stimulus_mode='on_demand' or 'canvas'
     r = models.FloatField()
 
     # Decision
     c1_max = models.FloatField()
     c1 = models.FloatField()
+    income_probes = models.LongStringField(blank=True)  # previewed table rows as c1@ms
+    c1_probes = models.LongStringField(blank=True)  # previewed c1 as c1@ms (live_payoff_preview)
 
     # Belief entry (raw and normalized)
     belief_input_raw = models.FloatField()  # 0–400 (B1)
+    belief_trajectory = models.LongStringField(blank=True)  # belief slider path (global/trajectory.js)
     h_hat = models.FloatField()  # normalized to [0,1]
 
     # Implied outcomes
     c2 = models.FloatField()
     u = models.FloatField()
 
+    # Time tracking (see start_page_timer)
+    page_timer_skew = models.BooleanField(initial=False)  # a server timer ran backwards, clamped to 0
     belief_choice_time_offset = models.FloatField()
     belief_choice_time_spent = models.FloatField()
+    belief_choice_client_ms = models.IntegerField(blank=True)
+
+    signal_time_offset = models.FloatField()
+    signal_time_spent = models.FloatField()
+    signal_client_ms = models.IntegerField(blank=True)
+    signal_image_ms = models.IntegerField(blank=True)  # render -> image visible
+    signal_exposure_ms = models.IntegerField(blank=True)  # image visible -> submit
+    signal_layout = models.StringField(blank=True)  # canvas mode: layout drawn by the browser
+    signal_layout_ok = models.BooleanField()  # canvas mode: signal_layout matches dots.dot_layout
 
 # -- oTree lifecycle hooks (function-based API) --
 def creating_session(subsession: Subsession):
@@ -67,6 +81,11 @@ class Explanation(Page):
     def is_displayed(player):
         return player.round_number == 1
 
+    @staticmethod
+    def vars_for_template(player):
+        # Fetch every scheduled image while the participant reads the instructions
+        return dict(preload_images=preload_stimuli(player, 't3', range(1, C.NUM_ROUNDS + 1)))
+
 
 class SyncGate(WaitPage):
     @staticmethod
@@ -79,27 +98,52 @@ class IncomeInfo(Page):
 
     @staticmethod
     def vars_for_template(player: Player):
-        return build_vars_for_template_choice(player, C)
+        return dict(
+            build_vars_for_template_choice(player, C),
+            preload_images=preload_stimuli(player, 't3', [player.round_number]),
+        )
+
+    @staticmethod
+    def js_vars(player: Player):
+        return build_js_vars_choice(player, C)
+
+    @staticmethod
+    def live_method(player: Player, data):
+        return live_payoff_preview(player, C, data, 'income_probes')
 
 
 class Signal(Page):
+    form_model = 'player'
+    form_fields = ['signal_client_ms', 'signal_image_ms', 'signal_exposure_ms', 'signal_layout']
+
     @staticmethod
     def vars_for_template(player: Player):
-        return dict(
-            image_file=player.image_file,
-            show_seconds= C.SIGNAL_SHOW_SECONDS,
-        )
+        start_page_timer(player, 'signal')
+        return build_vars_for_template_signal(player, C)
+
+    @staticmethod
+    def before_next_page(player: Player, timeout_happened):
+        stop_page_timer(player, 'signal')
+        verify_canvas_layout(player)
 
 
 class ChoiceBelief(Page):
     form_model = 'player'
-    form_fields = ['belief_input_raw', 'c1']
+    form_fields = ['belief_input_raw', 'c1', 'belief_choice_client_ms', 'belief_trajectory']
 
     @staticmethod
     def vars_for_template(player: Player):
-        player.belief_choice_time_offset = time.time()
+        start_page_timer(player, 'belief_choice')
         return build_vars_for_template_choice(player, C)
 
+    @staticmethod
+    def js_vars(player: Player):
+        return build_js_vars_choice(player, C)
+
+    @staticmethod
+    def live_method(player: Player, data):
+        return live_payoff_preview(player, C, data, 'c1_probes')
+
     @staticmethod
     def error_message(player: Player, values):
         v = values.get('belief_input_raw')
@@ -116,7 +160,8 @@ class ChoiceBelief(Page):
 
     @staticmethod
     def before_next_page(player: Player, timeout_happened):
-        player.belief_choice_time_spent = round(time.time() - player.belief_choice_time_offset, 2)
+        stop_page_timer(player, 'belief_choice')
+        check_trajectory(player)
         # Normalize belief for storing
         player.h_hat = float(player.belief_input_raw) / 100.0
 
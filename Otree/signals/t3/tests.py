@@ -0,0 +1,16 @@
+from otree.api import Bot, SubmissionMustFail, expect
+from . import *
+
+
+class PlayerBot(Bot):
+    def play_round(self):
+        if self.round_number == 1:
+            yield Explanation
+        yield IncomeInfo
+        yield Signal
+        yield SubmissionMustFail(ChoiceBelief, dict(belief_input_raw=401, c1=3))
+        yield SubmissionMustFail(ChoiceBelief, dict(belief_input_raw=50, c1=0))
+        yield SubmissionMustFail(ChoiceBelief, dict(belief_input_raw=50, c1=self.player.c1_max + 1))
+        yield ChoiceBelief, dict(belief_input_raw=50, c1=3)
+        expect(self.player.h_hat, 0.5)
+        expect(self.player.u, 3 * self.player.c2)
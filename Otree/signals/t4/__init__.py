@@ -1,7 +1,4 @@
 from otree.api import *
-import itertools
-import random
-import time
 from helper_functions import *
 
 doc = """
@@ -22,6 +19,8 @@ class C(BaseConstants):
 
     SIGNAL_SHOW_SECONDS = 6
 
+    ROLES = ('borrower',) * 10 + ('saver',) * 10
+
 
 
 
@@ -43,23 +42,36 @@ class Player(BasePlayer):
     pi = models.FloatField()  # inflation factor: 1.5 if r > 200 else 0.5
     p2 = models.FloatField()  # period-2 price (= pi * p1 by default)
     image_file = models.StringField()
+    image_seed = models.IntegerField()  # only set with stimulus_mode='on_demand' or 'canvas'
     r = models.FloatField()
     c1_max = models.FloatField()
 
     # Decision
     c1 = models.FloatField()
+    income_probes = models.LongStringField(blank=True)  # previewed table rows as c1@ms
 
     # Belief entry (raw and normalized)
     belief_input_raw = models.FloatField()  # 0–400 (B1)
+    belief_trajectory = models.LongStringField(blank=True)  # belief slider path (global/trajectory.js)
     h_hat = models.FloatField()  # normalized to [0,1]
 
     # Implied outcomes
     c2 = models.FloatField()
     u = models.FloatField()
 
-    # ---- helpers per spec ----
+    # Time tracking (see start_page_timer)
+    page_timer_skew = models.BooleanField(initial=False)  # a server timer ran backwards, clamped to 0
     belief_time_offset = models.FloatField()
     belief_time_spent = models.FloatField()
+    belief_client_ms = models.IntegerField(blank=True)
+
+    signal_time_offset = models.FloatField()
+    signal_time_spent = models.FloatField()
+    signal_client_ms = models.IntegerField(blank=True)
+    signal_image_ms = models.IntegerField(blank=True)  # render -> image visible
+    signal_exposure_ms = models.IntegerField(blank=True)  # image visible -> submit
+    signal_layout = models.StringField(blank=True)  # canvas mode: layout drawn by the browser
+    signal_layout_ok = models.BooleanField()  # canvas mode: signal_layout matches dots.dot_layout
 
 
 # -- oTree lifecycle hooks (function-based API) --
@@ -72,42 +84,25 @@ def creating_session(subsession: Subsession):
     Assign image file names. If C.IMAGE_FILES is not provided, synthesize names.
     Belief mode can be configured in SESSION_CONFIGS as 'belief_mode': 'B1' or 'B2' (default B1).
     """
-    # Build 20 pairs (r, x): each r appears once with x=0.5 and once with x=1.5
-    pairs = list(itertools.product(get_income_profile(), get_red_counts()))
-    pairs = [(y, y1) for (y1, y) in pairs]
-    roles_master = ['borrower'] * 10 + ['saver'] * 10
-    # Precompute a 20-item image list if explicit files not provided
-    image_files_master = synthesize_filenames(get_red_counts(), None)
-
-    # For each participant, randomize order and assign per-round parameters
-    for p in subsession.get_players():
-        if subsession.round_number == 1:
-            schedule = pairs[:]
-            random.shuffle(schedule)
-
-            images = image_files_master[:]
-            random.shuffle(images)
-
-            roles = roles_master[:]
-            random.shuffle(roles)
-
-            p.participant.vars['t4_schedule'] = schedule
-            p.participant.vars['t4_images'] = images
-            p.participant.vars['t4_roles'] = roles
-
-        r, y1 = p.participant.vars['t4_schedule'][subsession.round_number - 1]
-        image_file = p.participant.vars['t4_images'][subsession.round_number - 1]
-        current_role = p.participant.vars['t4_roles'][subsession.round_number - 1]
-
-        p.y1 = float(y1)
-        p.y2 = 15 if p.y1==5 else 5
-        p.red_count = int(r)
-        p.h_true = 1 if p.red_count > 200 else 0
-        p.pi = 2 if p.red_count > 200 else 0.5
-        p.p2 = p.pi * C.P1
-        p.image_file = image_file
-        p.current_role = current_role
-        p.c1_max = calc_c1_max(p)
+    design = get_design(C.P1, C.R)
+    players = subsession.get_players()
+
+    # Every participant's order comes from their own seeded stream; only permutation indices are stored.
+    # Schedule and images share one permutation so every image matches its red count;
+    # roles are shuffled independently, from a separate stream.
+    if subsession.round_number == 1:
+        perms = permutation_index(participant_permutations(players, 't4', len(design)))
+        role_perms = permutation_index(participant_permutations(players, 't4_roles', len(C.ROLES)))
+        for p, index, role_index in zip(players, perms, role_perms):
+            p.participant.vars['t4_perm'] = index
+            p.participant.vars['t4_role_perm'] = role_index
+        assign_stimulus_seeds(players)
+
+    # For each participant, assign per-round parameters
+    for p in players:
+        assign_design_row(p, scheduled(design, p.participant.vars['t4_perm'], subsession.round_number))
+        p.current_role = scheduled(C.ROLES, p.participant.vars['t4_role_perm'], subsession.round_number)
+        assign_image_seed(p, 't4', subsession.round_number)
 
         if p.current_role == 'borrower':
             p.c1 = p.y1 + 3
@@ -121,6 +116,11 @@ class Explanation(Page):
     def is_displayed(player):
         return player.round_number == 1
 
+    @staticmethod
+    def vars_for_template(player):
+        # Fetch every scheduled image while the participant reads the instructions
+        return dict(preload_images=preload_stimuli(player, 't4', range(1, C.NUM_ROUNDS + 1)))
+
 
 class IncomeInfo(Page):
     form_model = 'player'
@@ -133,29 +133,40 @@ class IncomeInfo(Page):
             R=C.R,
             y2=player.y2,
             c1=player.c1,
-            table_rows=build_payoff_table(
-                player.y1, player.y2, C.P1, C.R, player.c1_max
-            ),
+            preload_images=preload_stimuli(player, 't4', [player.round_number]),
         )
-        # Build a payoff table like the document’s panel: c1 = 1..20; columns for π=0.5 and π=1.5
+
+    @staticmethod
+    def js_vars(player: Player):
+        return build_js_vars_choice(player, C)
+
+    @staticmethod
+    def live_method(player: Player, data):
+        return live_payoff_preview(player, C, data, 'income_probes')
 
 
 class Signal(Page):
+    form_model = 'player'
+    form_fields = ['signal_client_ms', 'signal_image_ms', 'signal_exposure_ms', 'signal_layout']
+
     @staticmethod
     def vars_for_template(player: Player):
-        return dict(
-            image_file=player.image_file,
-            show_seconds=C.SIGNAL_SHOW_SECONDS,
-        )
+        start_page_timer(player, 'signal')
+        return build_vars_for_template_signal(player, C)
+
+    @staticmethod
+    def before_next_page(player: Player, timeout_happened):
+        stop_page_timer(player, 'signal')
+        verify_canvas_layout(player)
 
 
 class Belief(Page):
     form_model = 'player'
-    form_fields = ['belief_input_raw']
+    form_fields = ['belief_input_raw', 'belief_client_ms', 'belief_trajectory']
 
     @staticmethod
     def vars_for_template(player: Player):
-        player.belief_time_offset = time.time()
+        start_page_timer(player, 'belief')
     @staticmethod
     def error_message(player: Player, values):
         v = values.get('belief_input_raw')
@@ -166,7 +177,8 @@ class Belief(Page):
 
     @staticmethod
     def before_next_page(player: Player, timeout_happened):
-        player.belief_time_spent = round(time.time() - player.belief_time_offset, 2)
+        stop_page_timer(player, 'belief')
+        check_trajectory(player)
         # Normalize belief for storing
         player.h_hat = float(player.belief_input_raw) / 100.0
 
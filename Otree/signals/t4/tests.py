@@ -0,0 +1,22 @@
+from otree.api import Bot, SubmissionMustFail, expect
+from . import *
+
+
+class PlayerBot(Bot):
+    def play_round(self):
+        if self.round_number == 1:
+            yield Explanation
+        yield IncomeInfo
+        yield Signal
+        yield SubmissionMustFail(Belief, dict(belief_input_raw=-1))
+        yield SubmissionMustFail(Belief, dict(belief_input_raw=401))
+        # A path over TRAJECTORY_MAX_CHARS is cut to the whole samples that fit, not dropped
+        values, ms = [0, 400] * 2500, list(range(0, 150_000_000, 30_000))
+        yield Belief, dict(belief_input_raw=70, belief_trajectory=encode_trajectory(values, ms))
+        expect(self.player.h_hat, 0.7)
+        kept, kept_ms = decode_trajectory(self.player.belief_trajectory)
+        expect(len(self.player.belief_trajectory), '<=', TRAJECTORY_MAX_CHARS)
+        expect(len(kept), '>', 1000)
+        expect(kept.tolist(), values[:len(kept)])
+        expect(kept_ms.tolist(), ms[:len(kept)])
+        expect(self.player.c1, self.player.y1 + (3 if self.player.current_role == 'borrower' else -3))
@@ -0,0 +1,61 @@
+"""
+Unit tests of the dots renderer, outside the bot runs. From the project root:
+
+    python -m pytest tests
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import dots
+
+# A shipped stimulus, the geometry render_dot_grid is calibrated to
+REFERENCE_PNG = Path(dots.__file__).parent / "_static" / "dots_T0_120_x1.png"
+
+
+def raster_geometry(rgb):
+    """Dot coverage, frame box and outer dot-centre span of a rendered grid, as fractions of its width."""
+    width = rgb.shape[1]
+    dot = np.abs(rgb[:, :, 0].astype(int) - rgb[:, :, 2]) > 128
+    frame = rgb.max(axis=2) < 128
+    rows, cols = np.flatnonzero(frame.mean(axis=1) > 0.5), np.flatnonzero(frame.mean(axis=0) > 0.5)
+    dot_rows = np.flatnonzero(dot.any(axis=1))
+    return dict(
+        coverage=dot.mean(),
+        frame=(rows[-1] - rows[0]) / width,
+        frame_offset=(rows[0] + cols[0]) / 2 / width,
+        span=(dot_rows[-1] - dot_rows[0]) / width,
+    )
+
+
+def test_render_matches_shipped_stimulus():
+    reference = dots.decode_png(REFERENCE_PNG.read_bytes())
+    rendered = dots.render_dot_grid(n_red=120, seed=1)
+    assert rendered.shape[0] == pytest.approx(reference.shape[0], rel=0.01)
+    expected = raster_geometry(reference)
+    for name, value in raster_geometry(rendered).items():
+        assert value == pytest.approx(expected[name], rel=0.05), name
+
+
+def test_png_round_trip():
+    rgb = dots.render_dot_grid(n_red=3, grid_size=4, seed=7)
+    assert np.array_equal(dots.decode_png(dots.encode_png(rgb)), rgb)
+
+
+def test_layout_colours_the_red_cells():
+    red = dots.dot_layout(120, seed=1).reshape(20, 20)
+    rgb = dots.render_dot_grid(n_red=120, seed=1)
+    margin = dots.RASTER_PAD_PX + dots.FRAME_PX + round(dots.FRAME_MARGIN * 19 * dots.DOT_PITCH_PX - dots.DOT_PITCH_PX / 2)
+    centres = margin + dots.DOT_PITCH_PX // 2 + dots.DOT_PITCH_PX * np.arange(20)
+    assert np.array_equal(rgb[centres[:, None], centres[None, :], 0] == 255, red)
+
+
+def test_display_size_render_uses_the_palette():
+    indices = dots.render_dot_grid(n_red=120, seed=1, scale=0.34, palette=dots.PALETTE)
+    assert indices.shape == (794, 794) and indices.max() < len(dots.PALETTE)
+    rgb = dots.decode_png(dots.encode_png(indices, dots.PALETTE))
+    assert np.array_equal(rgb, np.array(dots.PALETTE, dtype=np.uint8)[indices])
+    expected = raster_geometry(dots.render_dot_grid(n_red=120, seed=1))
+    for name, value in raster_geometry(rgb).items():
+        assert value == pytest.approx(expected[name], rel=0.05), name
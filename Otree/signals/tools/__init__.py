@@ -0,0 +1,10 @@
+"""
+Offline tooling for the signals project. Nothing here is imported by the apps, so the server
+never loads plotting, imaging or spreadsheet libraries. Run from the project root:
+
+    python -m tools.stimuli        render and publish the stimulus images
+    python -m tools.analysis       decision quality of exported rounds
+    python -m tools.payout_budget  Monte Carlo payout budget per session size
+    python -m tools.csv_locale     rewrite an exported CSV for another locale
+    python -m tools.replay         regenerate a participant's draws from the master seed
+"""
@@ -0,0 +1,229 @@
+"""
+Decision quality of the recorded main rounds: expected-utility-optimal c1 given the stated
+belief, ex-post optimal c1 given the true π, efficiency ratios and belief errors, computed
+in closed form over whole columns (one row per participant, treatment and round).
+
+    python -m tools.analysis export.csv [more.csv ...] [--by treatment participant_code]
+
+Input is the rows of record_main_round: columns participant_code, treatment, round, c1,
+h_hat, y1 and red_count (y2 and π follow from the design). oTree's per-app exports work
+too: player.* columns keep their field name, the other models' columns are namespaced
+(participant.code is participant_code, session.code session_code) and
+subsession.round_number is read as round; pass --treatment for files without a treatment
+column. With a belief_trajectory
+column (payoff's round export) the belief slider dynamics are summarized as well.
+"""
+import argparse
+import base64
+import csv
+import time
+
+import numpy as np
+
+from helper_functions import ASSIGNED_C1_TREATMENTS, Price, decode_varints, get_income_profile, unzigzag
+
+P1 = 1.0  # C.P1 of the treatment apps
+R = 1.0  # C.R of the treatment apps
+NUMERIC = ("round", "c1", "h_hat", "y1", "red_count")
+# oTree per-app export prefixes; player.* columns are the player's fields, the others get
+# namespaced so participant.code, session.code, player.payoff and participant.payoff stay apart
+MODEL_PREFIXES = ("participant", "player", "group", "subsession", "session")
+ALIASES = {"round_number": "round", "subsession_round_number": "round"}
+
+
+def other_income(y1):
+    low, high = get_income_profile()
+    return np.where(y1 == low, high, low)
+
+
+def expected_inverse_p2(q, p1=P1):
+    """E[1 / p2] when π = HIGH with probability q; c2 and u are linear in it."""
+    return ((1 - q) / Price.LOW.value + q / Price.HIGH.value) / p1
+
+
+def expected_u(c1, y1, y2, q, p1=P1, R=R):
+    """E[c1 * c2] (calc_c2) when π = HIGH with probability q."""
+    return c1 * (y2 + R * (y1 - p1 * c1) * expected_inverse_p2(q, p1))
+
+
+def optimal_c1(y1, y2, q, p1=P1, R=R):
+    """
+    Integer c1 in [1, c1_max] maximizing expected_u. Expected u is a concave parabola in c1
+    with vertex (y2 / (R m) + y1) / (2 p1), m = E[1 / p2], so the best integer is the
+    rounded vertex, clipped to the slider range.
+    """
+    vertex = (y2 / (R * expected_inverse_p2(q, p1)) + y1) / (2 * p1)
+    return np.clip(np.round(vertex), 1, np.floor(y1 + y2 / 2))
+
+
+def evaluate(columns, p1=P1, R=R):
+    """
+    Per-row decision quality for a mapping of equally long columns (see module docstring).
+    Returns a dict of arrays aligned with the input rows:
+      c1_ex_ante / efficiency_ex_ante  best c1 under the stated h_hat, E[u](c1) / E[u](best)
+      c1_ex_post / efficiency_ex_post  best c1 knowing π, u(c1) / u(best)
+      belief_error / abs_belief_error  h_hat minus the truth the lottery scores against (π = HIGH)
+    Rows with missing values give NaN, and so do the efficiencies of ASSIGNED_C1_TREATMENTS rows,
+    where c1 is set by role rather than chosen.
+    """
+    y1 = np.asarray(columns["y1"], dtype=float)
+    c1 = np.asarray(columns["c1"], dtype=float)
+    h_hat = np.asarray(columns["h_hat"], dtype=float)
+    high = (np.asarray(columns["red_count"], dtype=float) > 200).astype(float)
+    y2 = other_income(y1)
+
+    c1_ex_ante = optimal_c1(y1, y2, h_hat, p1, R)
+    c1_ex_post = optimal_c1(y1, y2, high, p1, R)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        efficiency_ex_ante = expected_u(c1, y1, y2, h_hat, p1, R) / expected_u(c1_ex_ante, y1, y2, h_hat, p1, R)
+        efficiency_ex_post = expected_u(c1, y1, y2, high, p1, R) / expected_u(c1_ex_post, y1, y2, high, p1, R)
+    assigned = np.isin(np.asarray(columns["treatment"]), ASSIGNED_C1_TREATMENTS)
+    efficiency_ex_ante[assigned] = np.nan
+    efficiency_ex_post[assigned] = np.nan
+    belief_error = h_hat - high
+    return dict(
+        c1_ex_ante=c1_ex_ante,
+        efficiency_ex_ante=efficiency_ex_ante,
+        c1_ex_post=c1_ex_post,
+        efficiency_ex_post=efficiency_ex_post,
+        belief_error=belief_error,
+        abs_belief_error=np.abs(belief_error),
+    )
+
+
+def trajectory_features(blobs):
+    """
+    Reaction dynamics of belief_trajectory blobs (global/trajectory.js), all decoded in one
+    vectorized pass over their concatenated bytes. Returns a dict of float arrays aligned with
+    blobs (NaN for empty or invalid ones):
+      start / final       slider value at render and at submit
+      moves               number of changes
+      latency_ms          render to the first change
+      duration_ms         render to the last change
+      path_length         sum of |Δvalue|
+      reversals           changes of direction
+    """
+    n = len(blobs)
+    decoded = [b""] * n
+    for k, blob in enumerate(blobs):
+        try:
+            decoded[k] = base64.b64decode(blob or "", validate=True)
+        except ValueError:
+            pass
+    sizes = np.array([len(d) for d in decoded])
+    data = np.frombuffer(b"".join(decoded), np.uint8)
+
+    # Varints per blob; a blob cut inside a number or a pair is dropped with all its numbers
+    ends = np.concatenate([[0], np.cumsum(data < 0x80)])
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    counts = np.diff(ends[bounds])
+    truncated = np.zeros(n, bool)
+    last = bounds[1:] - 1
+    truncated[sizes > 0] = data[last[sizes > 0]] >= 0x80
+    valid = (counts > 0) & (counts % 2 == 0) & ~truncated
+    if truncated.any():
+        # a truncated blob's trailing bytes run into the next blob's first number
+        data = data[np.repeat(~truncated, sizes)]
+        counts[truncated] = 0
+    numbers = decode_varints(data)[np.repeat(valid, counts)]
+
+    samples = np.where(valid, counts // 2, 0)
+    seg = np.repeat(np.arange(n), samples)
+    first = np.cumsum(samples) - samples
+    dv, dt = unzigzag(numbers[0::2]), numbers[1::2]
+    values, ms = np.cumsum(dv), np.cumsum(dt)
+    # restart the running sums at every trajectory
+    values -= np.repeat(values[first[valid]] - dv[first[valid]], samples[valid])
+    ms -= np.repeat(ms[first[valid]] - dt[first[valid]], samples[valid])
+
+    move = np.ones(dv.size, bool)
+    move[first[valid]] = False
+    step = np.sign(dv) * move
+    reversal = (step[1:] * step[:-1] < 0) & (seg[1:] == seg[:-1])
+
+    def per_trajectory(weights):
+        return np.bincount(seg, weights, minlength=n)
+
+    def at(array, index, ok):
+        out = np.full(n, np.nan)
+        out[ok] = array[index[ok]]
+        return out
+
+    nan = np.where(valid, 0.0, np.nan)
+    return dict(
+        start=at(values, first, valid),
+        final=at(values, first + samples - 1, valid),
+        moves=samples - 1 + nan,
+        latency_ms=at(ms, first + 1, valid & (samples > 1)),
+        duration_ms=at(ms, first + samples - 1, valid),
+        path_length=per_trajectory(np.abs(dv) * move) + nan,
+        reversals=np.bincount(seg[1:][reversal], minlength=n) + nan,
+    )
+
+
+def summarize(columns, results, by=("treatment",)):
+    """Mean of every result per group of the by columns, as {"a | b": {name: mean}}."""
+    keys = np.array([" | ".join(map(str, k)) for k in zip(*(columns[name] for name in by))])
+    groups, inverse = np.unique(keys, return_inverse=True)
+    means = {}
+    for name, values in results.items():
+        valid = ~np.isnan(values)
+        counts = np.bincount(inverse[valid], minlength=len(groups))
+        with np.errstate(invalid="ignore"):
+            means[name] = np.bincount(inverse[valid], values[valid], minlength=len(groups)) / counts
+    return {group: {name: means[name][i] for name in results} for i, group in enumerate(groups)}
+
+
+def column_name(header):
+    """record_main_round name of an export column: player.c1 -> c1, session.code -> session_code."""
+    model, _, field = header.partition(".")
+    if field and model in MODEL_PREFIXES:
+        header = field if model == "player" else f"{model}_{field}"
+    return ALIASES.get(header, header)
+
+
+def read_rows(path, treatment=None):
+    """Columns of an exported CSV file, normalized to the record_main_round names."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [column_name(h) for h in next(reader)]
+        rows = list(reader)
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(header)}
+    if "treatment" not in columns:
+        if treatment is None:
+            raise ValueError(f"{path} has no treatment column, pass --treatment")
+        columns["treatment"] = [treatment] * len(rows)
+    for name in NUMERIC:
+        columns[name] = np.array([float(v) if v not in ("", "None") else np.nan for v in columns[name]])
+    return columns
+
+
+def concat(parts):
+    return {name: np.concatenate([np.asarray(p[name]) for p in parts]) for name in parts[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--by", nargs="+", default=["treatment"],
+                        help="grouping columns, e.g. treatment participant_code round")
+    parser.add_argument("--treatment", help="treatment of files without a treatment column")
+    args = parser.parse_args(argv)
+
+    columns = concat([read_rows(path, args.treatment) for path in args.files])
+    start = time.perf_counter()
+    results = evaluate(columns)
+    if "belief_trajectory" in columns:
+        results.update(trajectory_features(columns["belief_trajectory"]))
+    summary = summarize(columns, results, args.by)
+    elapsed = time.perf_counter() - start
+
+    names = list(results)
+    print(f"{len(columns['c1'])} rows in {elapsed * 1000:.1f} ms")
+    print(f"{' | '.join(args.by):<30}" + "".join(f"{name:>20}" for name in names))
+    for group, means in summary.items():
+        print(f"{group:<30}" + "".join(f"{means[name]:>20.3f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Rewrite an exported CSV (comma-delimited, dot decimals) for another locale, one row at a time.
+
+    python -m tools.csv_locale payoff_custom_export_rounds.csv rounds_de.csv [--locale de]
+"""
+import argparse
+import csv
+import re
+
+# locale -> (field separator, decimal mark); 'de' is what German Excel opens directly
+CSV_LOCALES = dict(en=(",", "."), de=(";", ","))
+DECIMAL_NUMBER = re.compile(r"-?\d+\.\d+(e[-+]?\d+)?")
+
+
+def localize_rows(rows, locale="en"):
+    """Rows with the decimal mark of locale in floats and decimal strings, one row at a time."""
+    decimal = CSV_LOCALES[locale][1]
+    for row in rows:
+        if decimal == ".":
+            yield row
+            continue
+        yield [
+            str(v).replace(".", decimal)
+            if isinstance(v, float) or (isinstance(v, str) and DECIMAL_NUMBER.fullmatch(v))
+            else v
+            for v in row
+        ]
+
+
+def write_csv(rows, fp, locale="en"):
+    """Stream rows to the open file fp as CSV in locale."""
+    writer = csv.writer(fp, delimiter=CSV_LOCALES[locale][0])
+    for row in localize_rows(rows, locale):
+        writer.writerow(row)
+
+
+def convert_csv(input_file, output_file, locale="de"):
+    with open(input_file, newline="", encoding="utf-8-sig") as src, \
+            open(output_file, "w", newline="", encoding="utf-8-sig") as dst:
+        write_csv(csv.reader(src), dst, locale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--locale", choices=list(CSV_LOCALES), default="de")
+    args = parser.parse_args(argv)
+
+    convert_csv(args.input_file, args.output_file, args.locale)
+    print(f"Converted file saved as {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Monte Carlo payout budget: simulates the payment of many participants under a behaviour
+model and reports the payout distribution and the budget per session size.
+
+    python -m tools.payout_budget --participants 2000000 --sizes 20 50 100 200 --models optimal random noisy
+
+Payment follows payoff.finalize_payments: one main round is paid, drawn uniformly over the
+four treatments' rounds, then consumption (u = c1 * c2 in points) or the belief lottery
+(run_binary_lottery, for binary_lotterie_prize) with probability 1/2 each, converted
+at conversion_rate on top of showup_fee. Every main round's (red_count, y1) is marginally
+uniform over get_design(), so only the paid round is simulated, as flat arrays.
+
+Behaviour models (the choice comes before the signal in t0_baseline, after it in t1/t3;
+t4 assigns c1 = y1 ± 3 by role):
+  optimal  knows whether π = 2 once the signal is shown, reports h_hat = 1 or 0 and picks
+           the c1 with the highest expected u (tools.analysis.optimal_c1)
+  random   uniform belief and uniform integer c1 in [1, c1_max]
+  noisy    perceives the red count with Gaussian noise of sd --noise, reports a logistic
+           belief in π = 2 and picks the c1 with the highest expected u under it
+"""
+import argparse
+import time
+
+import numpy as np
+
+from helper_functions import calc_c2, get_design, run_binary_lottery
+from settings import SESSION_CONFIGS
+from tools.analysis import P1, R, optimal_c1
+
+TREATMENTS = ('t0_baseline', 't1', 't3', 't4')
+MODELS = ('optimal', 'random', 'noisy')
+T4_OFFSET = 3  # t4: borrower c1 = y1 + 3, saver c1 = y1 - 3
+NOISE_SCALE = 1.702  # logistic approximation of the normal cdf
+
+
+def simulate(n, model, config, noise=40.0, rng=None):
+    """Payout in currency units of n simulated participants, as a float array."""
+    rng = rng or np.random.default_rng()
+    design = np.array(
+        [(row.red_count, row.y1, row.y2, row.p2, row.h_true, row.c1_max) for row in get_design(P1, R)],
+        dtype=float,
+    )
+    r, y1, y2, p2, h_true, c1_max = design[rng.integers(len(design), size=n)].T
+    high = r > 200
+    treatment = rng.integers(len(TREATMENTS), size=n)
+    signal_first = np.isin(treatment, [TREATMENTS.index('t1'), TREATMENTS.index('t3')])
+
+    # Belief P(π = 2) after the signal, reported on the 0-100 slider
+    if model == 'optimal':
+        q = high.astype(float)
+    elif model == 'random':
+        q = rng.random(n)
+    elif model == 'noisy':
+        perceived = r + noise * rng.standard_normal(n)
+        q = 1.0 / (1.0 + np.exp(-NOISE_SCALE * (perceived - 200) / noise))
+    else:
+        raise ValueError(f'unknown model {model!r}')
+    h_hat = np.round(q * 100) / 100
+
+    if model == 'random':
+        c1 = np.floor(rng.random(n) * c1_max) + 1
+    else:
+        c1 = optimal_c1(y1, y2, np.where(signal_first, q, 0.5), P1, R)
+    is_t4 = treatment == TREATMENTS.index('t4')
+    c1 = np.where(is_t4, y1 + np.where(rng.random(n) < 0.5, T4_OFFSET, -T4_OFFSET), c1)
+    u_points = c1 * calc_c2(y1, y2, P1, p2, c1, R)
+
+    belief = rng.random(n) < 0.5
+    if not config.get('belief_pay_enabled', True):
+        belief[:] = False
+    belief_points, _, _ = run_binary_lottery(h_hat, h_true, rng.random(n), config['binary_lotterie_prize'])
+    points = np.where(belief, belief_points, u_points)
+    return float(config['showup_fee']) + points * float(config['conversion_rate'])
+
+
+def session_totals(payouts, size):
+    """Total payout of every complete session of size participants drawn from payouts."""
+    sessions = payouts.size // size
+    return payouts[:sessions * size].reshape(sessions, size).sum(axis=1)
+
+
+def report(model, payouts, sizes, seconds):
+    p50, p95, p99 = np.percentile(payouts, [50, 95, 99])
+    print(f'\n=== {model}: {payouts.size:,} participants in {seconds:.2f} s')
+    print(f'per participant  mean {payouts.mean():.2f}  sd {payouts.std():.2f}  '
+          f'p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  max {payouts.max():.2f}')
+    print(f"{'session size':>12} {'sessions':>9} {'mean':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for size in sizes:
+        totals = session_totals(payouts, size)
+        if not totals.size:
+            continue
+        t95, t99 = np.percentile(totals, [95, 99])
+        print(f'{size:>12} {totals.size:>9} {totals.mean():>10.2f} {t95:>10.2f} {t99:>10.2f} '
+              f'{totals.max():>10.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--participants', type=int, default=2_000_000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 50, 100, 200])
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=list(MODELS))
+    parser.add_argument('--config', default='signals', help='name in settings.SESSION_CONFIGS')
+    parser.add_argument('--noise', type=float, default=40.0, help='sd of the perceived red count')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--showup-fee', type=float)
+    parser.add_argument('--conversion-rate', type=float)
+    parser.add_argument('--prize', type=float, help='binary_lotterie_prize')
+    args = parser.parse_args(argv)
+
+    config = dict(next(c for c in SESSION_CONFIGS if c['name'] == args.config))
+    for key, value in (('showup_fee', args.showup_fee), ('conversion_rate', args.conversion_rate),
+                       ('binary_lotterie_prize', args.prize)):
+        if value is not None:
+            config[key] = value
+
+    rng = np.random.default_rng(args.seed)
+    print(f"showup_fee {config['showup_fee']}  conversion_rate {config['conversion_rate']}  "
+          f"binary_lotterie_prize {config['binary_lotterie_prize']}")
+    for model in args.models:
+        start = time.perf_counter()
+        payouts = simulate(args.participants, model, config, args.noise, rng)
+        report(model, payouts, args.sizes, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
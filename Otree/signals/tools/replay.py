@@ -0,0 +1,84 @@
+"""
+Replays one participant's random draws from the session's master seed, without the database:
+the treatment schedules, the t4 roles, the training order, the stimulus seed and the payoff
+draws. The master seed is session.vars["master_seed"] (set from the session config master_seed,
+or fresh entropy when that is None).
+
+    python -m tools.replay MASTER_SEED ID_IN_SESSION [ID_IN_SESSION ...]
+
+Every value only depends on the seed and the participant's id_in_session (helper_functions.
+stream_uniforms), so this matches the live session draw for draw.
+"""
+import argparse
+import itertools
+
+import numpy as np
+
+from helper_functions import (
+    get_design,
+    get_round_count,
+    permutation_from_index,
+    permutation_index,
+    seeded_permutations,
+    stream_uniforms,
+)
+from payoff import MAIN_ROUNDS_PER_PARTICIPANT, PAYOFF_DRAWS, TREATMENT_APPS
+from t4 import C as T4
+from training import C as TRAINING
+
+# create_session stream of each of payoff.TREATMENT_APPS, the order main_rounds records them in
+TREATMENT_STREAMS = ("t0", "t1", "t3", "t4")
+
+
+def _order(master_seed, id_in_session, stream, n_items):
+    index = permutation_index(seeded_permutations(master_seed, [id_in_session], stream, n_items))[0]
+    return permutation_from_index(index, n_items)
+
+
+def replay_participant(master_seed, id_in_session, main_rounds=MAIN_ROUNDS_PER_PARTICIPANT):
+    """All draws of one participant; the paid round assumes main_rounds recorded rounds."""
+    design = get_design(T4.P1, T4.R)
+    rounds = range(1, get_round_count() + 1)
+    schedules = {
+        stream: [design[_order(master_seed, id_in_session, stream, len(design))[r - 1]] for r in rounds]
+        for stream in TREATMENT_STREAMS
+    }
+    roles = [T4.ROLES[i] for i in _order(master_seed, id_in_session, "t4_roles", len(T4.ROLES))][:len(rounds)]
+    combos = list(itertools.product(TRAINING.PIS, TRAINING.INCOME))
+    training = [combos[i] for i in _order(master_seed, id_in_session, "training", len(combos))][:TRAINING.NUM_ROUNDS]
+
+    paid_draw, type_draw, u_draw = stream_uniforms(master_seed, "payoff", [id_in_session], PAYOFF_DRAWS)[0]
+    paid_index = int(np.floor(paid_draw * main_rounds))
+    return dict(
+        schedules=schedules,
+        t4_roles=roles,
+        training=training,
+        stimulus_seed=int(stream_uniforms(master_seed, "stimulus", [id_in_session], 1)[0, 0] * 2 ** 31),
+        paid_index=paid_index,
+        paid_round=(TREATMENT_APPS[paid_index // len(rounds)], paid_index % len(rounds) + 1),
+        belief_paid=bool(type_draw < 0.5),  # if belief payment is enabled
+        U_draw=float(u_draw),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("master_seed", type=int)
+    parser.add_argument("ids", type=int, nargs="+", metavar="id_in_session")
+    args = parser.parse_args(argv)
+
+    for id_in_session in args.ids:
+        draws = replay_participant(args.master_seed, id_in_session)
+        print(f"=== participant {id_in_session}")
+        for stream, rows in draws["schedules"].items():
+            print(f"{stream:<9}" + "  ".join(f"r={row.red_count} y1={row.y1}" for row in rows))
+        print(f"{'t4 roles':<9}" + "  ".join(draws["t4_roles"]))
+        print(f"{'training':<9}" + "  ".join(f"pi={pi} y1={y1}" for pi, y1 in draws["training"]))
+        print(f"stimulus_seed {draws['stimulus_seed']}")
+        treatment, round_number = draws["paid_round"]
+        print(f"paid index {draws['paid_index']} ({treatment} round {round_number}), "
+              f"{'belief' if draws['belief_paid'] else 'consumption'}, U_draw {draws['U_draw']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
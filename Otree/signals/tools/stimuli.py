@@ -0,0 +1,257 @@
+"""
+Build the stimulus images in _static: render every (treatment, red count, variant) grid, then
+publish the served variants (widths x formats, content-hashed) listed in stimuli/manifest.json.
+
+    python -m tools.stimuli --counts 120 185 195 205 215 280
+    python -m tools.stimuli --publish-only
+
+matplotlib (the default backend) and Pillow are imported only by the jobs that need them.
+The layout and the NumPy raster come from dots, which the apps also use at runtime.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from dots import PALETTE, dot_layout, encode_png, render_dot_grid
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "_static"
+MANIFEST_NAME = ".dots_manifest.json"
+# Content-hashed copies for long-lived caching, see publish_stimuli
+HASHED_DIR = "stimuli"
+HASHED_MANIFEST_NAME = "manifest.json"
+VARIANT_WIDTHS = (400, 800, 1200)
+# name -> (extension, MIME type). Lossless WebP is the smallest at full fidelity for these images;
+# AVIF only wins in lossy mode, which bleeds red into blue, so it is opt-in (--formats webp avif png)
+FORMATS = {"avif": ("avif", "image/avif"), "webp": ("webp", "image/webp"), "png": ("png", "image/png")}
+VARIANT_FORMATS = ("webp", "png")
+TREATMENTS = ["T0", "T1", "T3", "T4"]
+VARIANTS = ["x1", "x2"]
+BACKENDS = ["matplotlib", "numpy"]
+# Bump whenever create_dot_grid changes its output for the same inputs
+RENDER_VERSION = 2
+
+
+def create_dot_grid(n_red=120, grid_size=20, dot_size=50, filename="grid.png", seed=None,
+                    backend="matplotlib"):
+    if backend == "numpy":
+        with open(filename, "wb") as f:
+            f.write(encode_png(render_dot_grid(n_red, grid_size, dot_size, seed)))
+        return
+
+    import matplotlib
+
+    matplotlib.use("Agg")  # batch rendering runs headless, possibly in worker processes
+    import matplotlib.pyplot as plt
+
+    # Assign colors
+    red = dot_layout(n_red, grid_size, seed)
+    colors = np.where(red, "red", "blue")
+
+    # Create grid coordinates
+    x, y = np.meshgrid(range(grid_size), range(grid_size))
+    x, y = x.flatten(), y.flatten()
+
+    # Plot
+    plt.figure(figsize=(4, 4))
+    plt.scatter(x, y, c=colors, s=dot_size)
+    plt.gca().invert_yaxis()  # Optional: put (0,0) at top-left
+    plt.axis("off")
+    plt.savefig(filename, dpi=300, bbox_inches="tight")
+    plt.close()
+
+
+def stimulus_filename(treatment, n_red, variant):
+    return f"dots_{treatment}_{n_red}_{variant}.png"
+
+
+def stimulus_seed(treatment, n_red, variant):
+    # Stable across runs and machines (unlike hash()), so re-runs reproduce the same layout
+    return zlib.crc32(stimulus_filename(treatment, n_red, variant).encode())
+
+
+def stimulus_hash(n_red, seed, grid_size, dot_size, backend="matplotlib"):
+    key = json.dumps([RENDER_VERSION, backend, n_red, seed, grid_size, dot_size])
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def generate_stimuli(red_counts, treatments=TREATMENTS, variants=VARIANTS, out_dir=STATIC_DIR,
+                     grid_size=20, dot_size=50, workers=None, force=False, backend="matplotlib"):
+    """
+    Render every (treatment, red count, variant) image into out_dir across a process pool.
+
+    out_dir keeps a manifest of content hashes; images whose hash is unchanged are skipped,
+    so re-runs only render what is new. Files without a manifest entry (e.g. hand-made
+    stimuli) are never overwritten unless force is set.
+    Returns the list of rendered file names.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+
+    jobs = []
+    for treatment in treatments:
+        for variant in variants:
+            for n_red in red_counts:
+                name = stimulus_filename(treatment, n_red, variant)
+                seed = stimulus_seed(treatment, n_red, variant)
+                digest = stimulus_hash(n_red, seed, grid_size, dot_size, backend)
+                if not force and (out_dir / name).exists():
+                    if manifest.get(name) == digest:
+                        continue
+                    if name not in manifest:
+                        print(f"Skipping {name}: not generated by this tool (use --force)")
+                        continue
+                jobs.append((n_red, grid_size, dot_size, str(out_dir / name), seed, backend, digest))
+
+    rendered = []
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for name, digest in pool.map(_render_job, jobs):
+                manifest[name] = digest
+                rendered.append(name)
+        _save_manifest(out_dir, manifest)
+    return rendered
+
+
+def _render_job(job):
+    n_red, grid_size, dot_size, filename, seed, backend, digest = job
+    create_dot_grid(n_red=n_red, grid_size=grid_size, dot_size=dot_size, filename=filename, seed=seed,
+                    backend=backend)
+    return os.path.basename(filename), digest
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(out_dir / MANIFEST_NAME, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out_dir, manifest):
+    tmp = out_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+
+
+def publish_stimuli(static_dir=STATIC_DIR, pattern="dots_*.png", widths=VARIANT_WIDTHS,
+                    formats=VARIANT_FORMATS, workers=None):
+    """
+    Build the served versions of every stimulus in static_dir: one file per width and format,
+    quantized to the fixed PALETTE, under content-hashed names in static_dir/stimuli/
+    (dots_T0_120_x1.800w.<digest>.webp). stimuli/manifest.json maps each logical name to a
+    fallback `src` and its `<source>` sets, in the order of formats (most preferred first).
+    A hashed file never changes, so browsers may cache it forever; files no longer listed are removed.
+    Returns the manifest.
+    """
+    static_dir = Path(static_dir)
+    hashed_dir = static_dir / HASHED_DIR
+    hashed_dir.mkdir(exist_ok=True)
+
+    jobs = [(str(source), str(hashed_dir), tuple(sorted(widths)), tuple(formats))
+            for source in sorted(static_dir.glob(pattern))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        manifest = dict(pool.map(_publish_job, jobs))
+
+    published = {Path(path).name for entry in manifest.values()
+                 for source in entry["sources"] for _, path in source["srcset"]}
+    for stale in hashed_dir.glob(pattern.replace(".png", ".*")):
+        if stale.name not in published:
+            stale.unlink()
+
+    tmp = hashed_dir / (HASHED_MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, hashed_dir / HASHED_MANIFEST_NAME)
+    return manifest
+
+
+def _publish_job(job):
+    from PIL import Image
+
+    source, hashed_dir, widths, formats = job
+    source, hashed_dir = Path(source), Path(hashed_dir)
+    with Image.open(source) as im:
+        rgb = im.convert("RGB")
+    palette = _palette_image()
+
+    srcsets = {fmt: [] for fmt in formats}
+    for width in widths:
+        resized = rgb.resize((width, round(rgb.height * width / rgb.width)), Image.LANCZOS)
+        # Nearest palette colour, without dithering: dots stay pure red or blue
+        quantized = resized.quantize(palette=palette, dither=Image.Dither.NONE)
+        for fmt in formats:
+            data = _encode_variant(quantized, fmt)
+            hashed_name = f"{source.stem}.{width}w.{hashlib.sha256(data).hexdigest()[:12]}.{FORMATS[fmt][0]}"
+            if not (hashed_dir / hashed_name).exists():
+                (hashed_dir / hashed_name).write_bytes(data)
+            srcsets[fmt].append([width, f"{HASHED_DIR}/{hashed_name}"])
+
+    # Browsers without <picture> support get the largest PNG, or the least preferred format
+    fallback = srcsets["png" if "png" in srcsets else formats[-1]][-1][1]
+    sources = [dict(type=FORMATS[fmt][1], srcset=srcsets[fmt]) for fmt in formats]
+    return source.name, dict(src=fallback, sources=sources)
+
+
+def _palette_image():
+    from PIL import Image
+
+    flat = [channel for rgb in PALETTE for channel in rgb]
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(flat + [0] * (768 - len(flat)))
+    return palette
+
+
+def _encode_variant(quantized, fmt):
+    buffer = io.BytesIO()
+    if fmt == "png":
+        quantized.save(buffer, "PNG", optimize=True, bits=4)
+    elif fmt == "webp":
+        # Lossless keeps the palette colours exact and beats lossy WebP on flat-colour dots
+        quantized.convert("RGB").save(buffer, "WEBP", lossless=True, method=6)
+    else:
+        quantized.convert("RGB").save(buffer, "AVIF", quality=40, subsampling="4:4:4")
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render dot-grid stimulus images.")
+    parser.add_argument("--counts", type=int, nargs="+", help="red dot counts")
+    parser.add_argument("--treatments", nargs="+", default=TREATMENTS)
+    parser.add_argument("--variants", nargs="+", default=VARIANTS)
+    parser.add_argument("--out-dir", default=str(STATIC_DIR))
+    parser.add_argument("--grid-size", type=int, default=20)
+    parser.add_argument("--dot-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per CPU")
+    parser.add_argument("--backend", choices=BACKENDS, default="matplotlib")
+    parser.add_argument("--force", action="store_true", help="re-render even if up to date")
+    parser.add_argument("--publish-only", action="store_true",
+                        help="only rebuild the served variants of existing images")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(VARIANT_WIDTHS))
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(VARIANT_FORMATS),
+                        help="most preferred first")
+    args = parser.parse_args(argv)
+    if args.counts is None and not args.publish_only:
+        parser.error("--counts is required unless --publish-only is given")
+
+    if not args.publish_only:
+        rendered = generate_stimuli(
+            args.counts, args.treatments, args.variants, args.out_dir,
+            args.grid_size, args.dot_size, args.workers, args.force, args.backend,
+        )
+        print(f"Rendered {len(rendered)} image(s) into {args.out_dir}")
+    manifest = publish_stimuli(args.out_dir, widths=args.widths, formats=args.formats, workers=args.workers)
+    print(f"Published {len(manifest)} image(s) as {len(args.widths)} widths x {', '.join(args.formats)} "
+          f"into {Path(args.out_dir) / HASHED_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from otree.api import *
 import itertools
-import random
 from helper_functions import *
 
 
@@ -23,18 +22,18 @@ class Subsession(BaseSubsession):
 
 def creating_session(subsession: Subsession):
     combos = list(itertools.product(C.PIS, C.INCOME))
-    for p in subsession.get_players():
-        if subsession.round_number == 1:
-            schedule = combos[:]
-            random.shuffle(schedule)
-            p.participant.vars['training_schedule'] = schedule
-
-        pi, y1 = p.participant.vars['training_schedule'][
-            subsession.round_number - 1
-        ]
+    precompute_payoff_tables(C.P1, C.R)
+    players = subsession.get_players()
+    if subsession.round_number == 1:
+        perms = participant_permutations(players, 'training', len(combos))
+        for p, index in zip(players, permutation_index(perms)):
+            p.participant.vars['training_perm'] = index
+
+    for p in players:
+        pi, y1 = scheduled(combos, p.participant.vars['training_perm'], subsession.round_number)
         p.pi = pi
         p.y1 = y1
-        p.y2 = 15 if y1 == 5 else 5
+        p.y2 = second_income(y1)
         p.p2 = pi * C.P1
         p.c1_max = calc_c1_max(p)
 
@@ -52,6 +51,7 @@ class Player(BasePlayer):
 
     # Decision
     c1 = models.FloatField()
+    c1_probes = models.LongStringField(blank=True)  # previewed c1 as c1@ms (live_payoff_preview)
 
     # Outcomes
     c2 = models.FloatField()
@@ -66,6 +66,14 @@ class Choice(Page):
     def vars_for_template(player: Player):
         return build_vars_for_template_choice(player, C)
 
+    @staticmethod
+    def js_vars(player: Player):
+        return build_js_vars_choice(player, C)
+
+    @staticmethod
+    def live_method(player: Player, data):
+        return live_payoff_preview(player, C, data, 'c1_probes')
+
     @staticmethod
     def error_message(player: Player, values):
         c1 = values['c1']
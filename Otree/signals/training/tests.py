@@ -0,0 +1,18 @@
+from otree.api import Bot, SubmissionMustFail, expect
+from . import *
+
+
+class PlayerBot(Bot):
+    def play_round(self):
+        yield SubmissionMustFail(Choice, dict(c1=0))
+        yield SubmissionMustFail(Choice, dict(c1=self.player.c1_max + 1))
+        # Slider previews are answered from the payoff table and logged as c1@ms
+        reply = Choice.live_method(self.player, dict(c1=2, ms=1500))[self.player.id_in_group]
+        expect(reply['feasible'], True)
+        expect(reply['outcomes'][0]['c2'], calc_c2(self.player.y1, self.player.y2, C.P1, Price.LOW.value * C.P1, 2, C.R))
+        Choice.live_method(self.player, dict(c1=self.player.c1_max + 1, ms=2100))
+        expect(self.player.c1_probes, f'2@1500,{self.player.c1_max + 1:g}@2100')
+        yield Choice, dict(c1=2)
+        expect(self.player.c2, calc_c2(self.player.y1, self.player.y2, C.P1, self.player.p2, 2, C.R))
+        expect(self.player.u, 2 * self.player.c2)
+        yield Result